@@ -1,7 +1,9 @@
-import sys, json, cv2, torch, requests
+import os, sys, json, cv2, requests
 import numpy as np
 from datetime import datetime
 
+from aura_perception import ObjectDetector, HazardEngine, draw_detections
+
 image_url = sys.argv[1]
 lidar_distance = float(sys.argv[2])
 
@@ -10,26 +12,24 @@ resp = requests.get(image_url)
 frame = cv2.imdecode(np.frombuffer(resp.content, np.uint8), cv2.IMREAD_COLOR)
 
 # YOLO
-model = torch.hub.load("ultralytics/yolov5", "yolov5s", pretrained=True)
-results = model(frame)
+model = ObjectDetector(os.getenv("AURA_YOLO_WEIGHTS", "yolov5su.pt"))
+results = model.detect(frame)
 
-objects = []
-for *box, conf, cls in results.xyxy[0]:
-    x1,y1,x2,y2 = map(int, box)
-    label = model.names[int(cls)]
-    objects.append({
-        "name": label,
-        "distance_m": lidar_distance
-    })
+# The LiDAR reading ranges the box under the image centre; others use box geometry
+hazards = HazardEngine(activate_frames=1).update(results, frame.shape, depth=lidar_distance)
+objects = [
+    {"name": o["name"], "distance_m": o["distance_m"]}
+    for o in hazards.objects
+]
 
-cv2.imwrite("annotated_frame.jpg", np.squeeze(results.render()))
+cv2.imwrite("annotated_frame.jpg", draw_detections(frame.copy(), results))
 
 scene = {
   "timestamp": datetime.utcnow().isoformat(),
   "scene": "workspace",
   "people": [o for o in objects if o["name"] == "person"],
   "objects": [o for o in objects if o["name"] != "person"],
-  "hazards": [],
+  "hazards": hazards.hazards,
   "image": "annotated_frame.jpg"
 }
 
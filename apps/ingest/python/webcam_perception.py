@@ -1,10 +1,15 @@
 import cv2
-import torch
 import numpy as np
 import json
 import os
+import threading
+import time
 from datetime import datetime
-from facenet_pytorch import MTCNN, InceptionResnetV1
+
+from aura_perception import (
+    ObjectDetector, FaceNetEmbedder, HazardEngine, draw_detections, draw_faces, match_embeddings,
+    LatestQueue, CaptureThread, Stage, PeriodicValue, emitter_from_env, open_capture,
+)
 
 # ---------------- CONFIG ----------------
 FACE_DB_DIR = "face_db"
@@ -12,18 +17,22 @@ EMB_PATH = f"{FACE_DB_DIR}/embeddings.npy"
 NAME_PATH = f"{FACE_DB_DIR}/names.json"
 
 DIST_THRESHOLD = 0.9
-MOCK_LIDAR = 2.0
+# Optional single-point range reading; distances come from box geometry otherwise
+LIDAR_DISTANCE = float(os.environ["AURA_LIDAR_M"]) if os.getenv("AURA_LIDAR_M") else None
+LOCATION_REFRESH_S = 60
+# No window or keyboard; used with AURA_CAMERA=<recording> for load tests
+HEADLESS = os.getenv("AURA_HEADLESS", "0") == "1"
+YOLO_WEIGHTS = os.getenv("AURA_YOLO_WEIGHTS", "yolov5su.pt")
 
 os.makedirs(FACE_DB_DIR, exist_ok=True)
 
 # ---------------- LOAD MODELS ----------------
 print("[INFO] Loading models...")
 
-mtcnn = MTCNN(keep_all=True)
-facenet = InceptionResnetV1(pretrained="vggface2").eval()
+embedder = FaceNetEmbedder(pretrained="vggface2")
 
-yolo = torch.hub.load("ultralytics/yolov5", "yolov5s", pretrained=True)
-yolo.conf = 0.4
+yolo = ObjectDetector(YOLO_WEIGHTS, conf=0.4)
+hazard_engine = HazardEngine()
 
 # ---------------- LOAD FACE DB ----------------
 if os.path.exists(EMB_PATH) and os.path.getsize(EMB_PATH) > 0:
@@ -38,22 +47,74 @@ else:
     embeddings = np.empty((0, 512))
     names = []
 
+# Enrollment runs off the frame loop, so the gallery is swapped under a lock
+db_lock = threading.Lock()
+
 # ---------------- UTILS ----------------
 def save_db():
     np.save(EMB_PATH, embeddings)
     with open(NAME_PATH, "w") as f:
         json.dump(names, f)
 
-def recognize_face(emb):
-    if len(embeddings) == 0:
-        return "unknown"
-
-    dists = np.linalg.norm(embeddings - emb, axis=1)
-    min_idx = np.argmin(dists)
+def recognize_faces(embs):
+    """Match all face embeddings of a frame against the gallery at once"""
+    with db_lock:
+        gallery, gallery_names = embeddings, names
+    labels, _ = match_embeddings(embs, gallery, gallery_names, DIST_THRESHOLD)
+    return labels
+
+def enroll_face(emb):
+    """Prompt for a name and store emb; runs on its own thread"""
+    global embeddings, names
+    person_name = input("Enter name for this face: ").strip()
+    if person_name:
+        with db_lock:
+            embeddings = np.vstack([embeddings, emb])
+            names = names + [person_name]
+            save_db()
+        print(f"[INFO] Added face: {person_name}")
+
+def delete_face():
+    """Prompt for a name and remove it from the gallery; runs on its own thread"""
+    global embeddings, names
+    print("Known faces:", names)
+    del_name = input("Enter name to delete: ").strip()
+    with db_lock:
+        if del_name in names:
+            idx = names.index(del_name)
+            embeddings = np.delete(embeddings, idx, axis=0)
+            names = names[:idx] + names[idx + 1:]
+            save_db()
+            print(f"[INFO] Deleted face: {del_name}")
 
-    if dists[min_idx] < DIST_THRESHOLD:
-        return names[min_idx]
-    return "unknown"
+prompt_thread = None
+
+def run_prompt(target, *args):
+    """Run a console prompt without blocking the frame loop, one at a time"""
+    global prompt_thread
+    if prompt_thread is not None and prompt_thread.is_alive():
+        return
+    prompt_thread = threading.Thread(target=target, args=args, daemon=True)
+    prompt_thread.start()
+
+# ---------------- INFERENCE STAGES ----------------
+def run_objects(frame):
+    detections = yolo.detect(frame.image)
+    hazards = hazard_engine.update(
+        detections, frame.image.shape, timestamp=frame.timestamp, depth=LIDAR_DISTANCE
+    )
+    for alert in hazards.alerts:
+        print(f"[HAZARD] {alert['message']}")
+    return frame.index, detections, hazards
+
+def run_faces(frame):
+    # One MTCNN pass and one batched FaceNet forward for every face
+    faces = embedder.detect(frame.image)
+    if faces:
+        labels = recognize_faces(np.stack([f.embedding for f in faces]))
+        for face, name in zip(faces, labels):
+            face.name = name
+    return frame.index, faces
 
 # ---------------- LOCATION PROVIDER ----------------
 import gpsd
@@ -114,8 +175,45 @@ def get_current_location():
 
   
 
-# ---------------- CAMERA ----------------
-cap = cv2.VideoCapture(0)
+# ---------------- SCENE ----------------
+def build_scene(people, hazards):
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "location": location.value,
+        "scene": "unknown",
+        "people": people,
+        "objects": [
+            {"name": o["name"], "distance_m": o["distance_m"]}
+            for o in hazards.objects if o["name"] != "person"
+        ] if hazards else [],
+        "hazards": hazards.hazards if hazards else [],
+        "image": "annotated_frame.jpg"
+    }
+
+# ---------------- CAMERA + PIPELINE ----------------
+# Webcam by default; AURA_CAMERA=<file.aurarec> replays a recorded session
+cap = open_capture()
+if not cap.isOpened():
+    raise RuntimeError("Could not open webcam")
+
+# Location is looked up in the background and read from the cache at quit
+location = PeriodicValue(get_current_location, LOCATION_REFRESH_S, name="location").start()
+
+display_queue = LatestQueue()
+object_inbox, object_results = LatestQueue(), LatestQueue()
+face_inbox, face_results = LatestQueue(), LatestQueue()
+
+# One scene record per processed frame (see AURA_SCENE_* env vars)
+scene_stream = emitter_from_env("scene.jsonl")
+
+capture = CaptureThread(cap, [display_queue, object_inbox, face_inbox])
+stages = [
+    Stage("objects", run_objects, object_inbox, object_results),
+    Stage("faces", run_faces, face_inbox, face_results),
+]
+capture.start()
+for stage in stages:
+    stage.start()
 
 print("""
 Aura Perception Console
@@ -126,105 +224,88 @@ Aura Perception Console
 """)
 
 scene_output = None
+annotated = None
+people, hazards = [], None
+last_emitted = (None, None)
+started = time.time()
 
+# Display runs at camera rate and overlays the newest inference results
 while True:
-    ret, frame = cap.read()
-    if not ret:
+    frame = display_queue.get(timeout=0.1)
+    if frame is None:
+        # A replayed recording ran out: finish as if [q] was pressed
+        if capture.finished.is_set():
+            if annotated is not None:
+                scene_output = build_scene(people, hazards)
+                cv2.imwrite("annotated_frame.jpg", annotated)
+            break
+        continue
+
+    object_index, objects, hazards = object_results.peek() or (None, [], None)
+    face_index, faces = face_results.peek() or (None, [])
+
+    annotated = frame.image.copy()
+    draw_detections(annotated, objects, show_confidence=False)
+    draw_faces(annotated, faces, known_color=(255, 0, 0), unknown_color=(255, 0, 0))
+
+    people = [
+        {
+            "name": face.name,
+            "distance_m": round(hazard_engine.estimator.estimate(
+                "face", face.bbox, frame.image.shape, LIDAR_DISTANCE), 2),
+            "activity": "unknown"
+        }
+        for face in faces
+    ]
+
+    # Stream a scene whenever either inference stage finished a new frame
+    if (object_index, face_index) != last_emitted:
+        last_emitted = (object_index, face_index)
+        scene_stream.emit(build_scene(people, hazards))
+
+    if HEADLESS:
         continue
 
-    # ---------- OBJECT DETECTION ----------
-    yolo_results = yolo(frame)
-    objects = []
-
-    for *box, conf, cls in yolo_results.xyxy[0]:
-        label = yolo.names[int(cls)]
-        x1, y1, x2, y2 = map(int, box)
-        objects.append((label, x1, y1, x2, y2))
-
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(
-            frame,
-            label,
-            (x1, y1 - 5),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (0, 255, 0),
-            2
-        )
-
-    # ---------- FACE DETECTION + EMBEDDINGS ----------
-    boxes, probs = mtcnn.detect(frame)
-    faces = mtcnn(frame)
-    people = []
-
-    if boxes is not None and faces is not None:
-        for i, box in enumerate(boxes):
-            x1, y1, x2, y2 = map(int, box)
-
-            emb = facenet(faces[i].unsqueeze(0)).detach().numpy()[0]
-            name = recognize_face(emb)
-
-            people.append({
-                "name": name,
-                "distance_m": MOCK_LIDAR,
-                "activity": "unknown"
-            })
-
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
-            cv2.putText(
-                frame,
-                name,
-                (x1, y1 - 5),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                (255, 0, 0),
-                2
-            )
-
-    cv2.imshow("Aura Perception Console", frame)
+    cv2.imshow("Aura Perception Console", annotated)
     key = cv2.waitKey(1) & 0xFF
 
     # ---------- ADD FACE ----------
-    if key == ord("a") and faces is not None:
-        person_name = input("Enter name for this face: ").strip()
-        if person_name:
-            emb = facenet(faces[0].unsqueeze(0)).detach().numpy()[0]
-            embeddings = np.vstack([embeddings, emb])
-            names.append(person_name)
-            save_db()
-            print(f"[INFO] Added face: {person_name}")
+    if key == ord("a") and faces:
+        # Reuse the embedding already computed for the shown faces
+        run_prompt(enroll_face, faces[0].embedding)
 
     # ---------- DELETE FACE ----------
     if key == ord("d"):
-        print("Known faces:", names)
-        del_name = input("Enter name to delete: ").strip()
-        if del_name in names:
-            idx = names.index(del_name)
-            embeddings = np.delete(embeddings, idx, axis=0)
-            names.pop(idx)
-            save_db()
-            print(f"[INFO] Deleted face: {del_name}")
+        run_prompt(delete_face)
 
     # ---------- QUIT ----------
     if key == ord("q"):
-        scene_output = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "location": get_current_location(),
-            "scene": "unknown",
-            "people": people,
-            "objects": [
-                {"name": o[0], "distance_m": MOCK_LIDAR}
-                for o in objects if o[0] != "person"
-            ],
-            "hazards": [],
-            "image": "annotated_frame.jpg"
-        }
+        scene_output = build_scene(people, hazards)
 
-        cv2.imwrite("annotated_frame.jpg", frame)
+        cv2.imwrite("annotated_frame.jpg", annotated)
         break
 
+capture.stop()
+for stage in stages:
+    stage.stop()
+location.stop()
+scene_stream.close()
+capture.join(timeout=1)
+
 cap.release()
-cv2.destroyAllWindows()
+if not HEADLESS:
+    cv2.destroyAllWindows()
+
+# ---------------- RUN STATS ----------------
+elapsed = time.time() - started
+print(f"[INFO] Captured {capture.frames} frames in {elapsed:.1f}s ({capture.frames / max(elapsed, 1e-9):.1f} fps)")
+for stage, inbox in zip(stages, (object_inbox, face_inbox)):
+    latencies = sorted(stage.latencies)
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0
+    print(f"[INFO] {stage.name} stage: {stage.processed} frames "
+          f"({stage.processed / max(elapsed, 1e-9):.1f} fps), {inbox.dropped} dropped, "
+          f"latency p50 {p50:.0f} ms p95 {p95:.0f} ms")
 
 # ---------------- SAVE JSON ----------------
 with open("scene.json", "w") as f:
@@ -1,25 +1,34 @@
 import cv2
-import torch
 import json
+import os
 from datetime import datetime
 
+from aura_perception import ObjectDetector, HazardEngine, draw_detections, emitter_from_env, open_capture
+
 # ---------- LOAD MODELS ----------
-print("[INFO] Loading YOLOv5...")
-model = torch.hub.load("ultralytics/yolov5", "yolov5s", pretrained=True)
-model.conf = 0.4
+model = ObjectDetector(os.getenv("AURA_YOLO_WEIGHTS", "yolov5su.pt"), conf=0.4)
 
 # ---------- OPEN WEBCAM ----------
-cap = cv2.VideoCapture(0)
+# AURA_CAMERA=<file.aurarec> replays a recorded session instead
+cap = open_capture()
 if not cap.isOpened():
     raise RuntimeError("Could not open webcam")
 
-print("[INFO] Press SPACE to capture frame, ESC to exit")
+HEADLESS = os.getenv("AURA_HEADLESS", "0") == "1"
+if not HEADLESS:
+    print("[INFO] Press SPACE to capture frame, ESC to exit")
 
 while True:
     ret, frame = cap.read()
     if not ret:
+        if getattr(cap, "exhausted", False):
+            raise RuntimeError("Recording ended before a frame was captured")
         continue
 
+    # Headless runs take the first frame
+    if HEADLESS:
+        break
+
     cv2.imshow("Aura Webcam Preview", frame)
     key = cv2.waitKey(1)
 
@@ -33,23 +42,21 @@ while True:
         exit()
 
 cap.release()
-cv2.destroyAllWindows()
+if not HEADLESS:
+    cv2.destroyAllWindows()
 
 # ---------- OBJECT DETECTION ----------
-results = model(frame)
-detections = []
+results = model.detect(frame)
 
-for *box, conf, cls in results.xyxy[0]:
-    x1, y1, x2, y2 = map(int, box)
-    label = model.names[int(cls)]
-
-    detections.append({
-        "name": label,
-        "distance_m": 2.0  # mock LiDAR for now
-    })
+# Single frame, so hazards fire without waiting for confirmation frames
+hazards = HazardEngine(activate_frames=1).update(results, frame.shape)
+detections = [
+    {"name": o["name"], "distance_m": o["distance_m"]}
+    for o in hazards.objects
+]
 
 # ---------- SAVE ANNOTATED IMAGE ----------
-annotated = results.render()[0]
+annotated = draw_detections(frame.copy(), results)
 cv2.imwrite("annotated_frame.jpg", annotated)
 
 # ---------- BUILD SCENE JSON ----------
@@ -58,7 +65,7 @@ scene = {
     "scene": "unknown",
     "people": [d for d in detections if d["name"] == "person"],
     "objects": [d for d in detections if d["name"] != "person"],
-    "hazards": [],
+    "hazards": hazards.hazards,
     "image": "annotated_frame.jpg"
 }
 
@@ -66,6 +73,11 @@ scene = {
 with open("scene.json", "w") as f:
     json.dump(scene, f, indent=2)
 
+# Also append to the streaming feed read by downstream ingestion
+scene_stream = emitter_from_env("scene.jsonl")
+scene_stream.emit(scene)
+scene_stream.close()
+
 print("\n=== AURA SCENE OUTPUT ===")
 print(json.dumps(scene, indent=2))
 print("\nSaved annotated_frame.jpg and scene.json")
@@ -0,0 +1,51 @@
+"""Shared perception runtime for Aura's vision backend and ingest workers."""
+from .registry import ModelRegistry, get_registry, model_dir
+from .types import Detection, FaceDetection
+from .detection import ObjectDetector
+from .faces import FaceNetEmbedder, DlibFaceEncoder, sharpness
+from .gallery import (
+    FacePrototype, FaceGallery, GallerySnapshot, prototypes_from_flat, flatten_prototypes,
+)
+from .matching import euclidean_distances, match_embeddings
+from .hazards import HazardEngine, HazardResult, DistanceEstimator
+from .pipeline import LatestQueue, Frame, CaptureThread, Stage, PeriodicValue
+from .recording import Recorder, Recording, ReplayCapture, open_capture
+from .scene_stream import SceneEmitter, ScenePublisher, emitter_from_env, read_scenes
+from .annotate import draw_detections, draw_faces
+
+__all__ = [
+    "ModelRegistry",
+    "get_registry",
+    "model_dir",
+    "Detection",
+    "FaceDetection",
+    "ObjectDetector",
+    "FaceNetEmbedder",
+    "DlibFaceEncoder",
+    "sharpness",
+    "FacePrototype",
+    "FaceGallery",
+    "GallerySnapshot",
+    "prototypes_from_flat",
+    "flatten_prototypes",
+    "euclidean_distances",
+    "match_embeddings",
+    "HazardEngine",
+    "HazardResult",
+    "DistanceEstimator",
+    "LatestQueue",
+    "Frame",
+    "CaptureThread",
+    "Stage",
+    "PeriodicValue",
+    "Recorder",
+    "Recording",
+    "ReplayCapture",
+    "open_capture",
+    "SceneEmitter",
+    "ScenePublisher",
+    "emitter_from_env",
+    "read_scenes",
+    "draw_detections",
+    "draw_faces",
+]
@@ -0,0 +1,26 @@
+"""Frame annotation helpers."""
+import cv2
+
+GREEN = (0, 255, 0)
+RED = (0, 0, 255)
+BLUE = (255, 0, 0)
+
+
+def draw_detections(frame, detections, color=GREEN, show_confidence=True):
+    """Draw object boxes and labels onto frame in place"""
+    for det in detections:
+        x1, y1, x2, y2 = det.bbox
+        text = f"{det.label} {det.confidence:.2f}" if show_confidence else det.label
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    return frame
+
+
+def draw_faces(frame, faces, known_color=GREEN, unknown_color=RED):
+    """Draw face boxes and names onto frame in place"""
+    for face in faces:
+        left, top, right, bottom = face.bbox
+        color = known_color if face.name.lower() != "unknown" else unknown_color
+        cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+        cv2.putText(frame, face.name, (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+    return frame
@@ -0,0 +1,423 @@
+"""Offline benchmark suite for the perception hot paths.
+
+    python -m aura_perception.benchmark --out bench.json
+    python -m aura_perception.benchmark --http http://localhost:5001 --concurrency 1 4 16
+    python -m aura_perception.benchmark --compare base.json bench.json
+
+Stages that need a model or library that is not available (or weights that
+are not cached yet, unless --allow-download is given) are reported as
+skipped instead of failing the run. Frames come from --video (a recording
+or any video OpenCV can read) or --image (shifted to simulate a clip);
+without either a synthetic clip is rendered, which gives comparable timings
+between runs but no real objects or faces. Face galleries are synthetic.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from .gallery import FacePrototype, GallerySnapshot
+
+GALLERY_SIZES = (10, 1000, 10000, 100000)
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Skipped(Exception):
+    pass
+
+
+def summarize(latencies, wall_time=None):
+    """Latency percentiles (ms) and throughput for a list of seconds"""
+    arr = np.asarray(latencies, dtype=np.float64) * 1000.0
+    wall_time = wall_time if wall_time is not None else float(np.sum(latencies))
+    stats = {"n": int(arr.size), "mean_ms": float(arr.mean()), "min_ms": float(arr.min()), "max_ms": float(arr.max())}
+    for p in PERCENTILES:
+        stats[f"p{p}_ms"] = float(np.percentile(arr, p))
+    stats["throughput_per_s"] = arr.size / wall_time if wall_time > 0 else 0.0
+    return stats
+
+
+def measure(fn, inputs, iterations, warmup=3):
+    """Call fn on inputs round-robin and summarize per-call latency"""
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def load_frames(path, count):
+    """An image plus shifted copies standing in for a video clip"""
+    import cv2
+
+    image = cv2.imread(path)
+    if image is None:
+        raise FileNotFoundError(path)
+    return [np.roll(image, shift=7 * i, axis=1) for i in range(count)]
+
+
+def load_video(path, count):
+    """Up to count frames from a recording or a video file"""
+    import cv2
+
+    from .recording import MAGIC, ReplayCapture
+
+    with open(path, "rb") as f:
+        is_recording = f.read(len(MAGIC)) == MAGIC
+    cap = ReplayCapture(path, speed=0) if is_recording else cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise FileNotFoundError(f"no frames in {path}")
+    return frames
+
+
+def synthetic_clip(count, width=640, height=480, seed=0):
+    """Deterministic textured frames with a few moving shapes"""
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    background = np.linspace(40, 200, width, dtype=np.float32)[None, :, None].repeat(height, 0).repeat(3, 2)
+    background += rng.normal(0, 12, (height, width, 3)).astype(np.float32)
+    background = np.clip(background, 0, 255).astype(np.uint8)
+    shapes = [
+        (rng.integers(0, width), rng.integers(height // 4, height), rng.integers(20, 90),
+         tuple(int(c) for c in rng.integers(0, 255, 3)), int(rng.integers(-12, 12)))
+        for _ in range(6)
+    ]
+
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        for x, y, size, color, dx in shapes:
+            cx = int(x + dx * i) % width
+            cv2.rectangle(frame, (cx - size // 2, y - size), (cx + size // 2, y), color, -1)
+            cv2.circle(frame, (cx, y - size - size // 4), size // 4, color, -1)
+        frames.append(frame)
+    return frames
+
+
+def synthetic_gallery(size, dim, seed=0, rows_per_identity=4):
+    """Snapshot of size unit-norm random rows, grouped into prototypes.
+
+    Every identity takes rows_per_identity consecutive rows (the mean plus
+    exemplars, as enrolled prototypes are matched), so the snapshot has
+    exactly size rows. Returns the snapshot and the raw row matrix.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.standard_normal((size, dim)).astype(np.float32)
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    prototypes = {
+        f"person_{start // rows_per_identity}": FacePrototype(
+            rows[start], rows[start + 1:start + rows_per_identity],
+            len(rows[start:start + rows_per_identity]),
+        )
+        for start in range(0, size, rows_per_identity)
+    }
+    return GallerySnapshot(1, prototypes), rows
+
+
+# ---------------- STAGES ----------------
+def bench_image_ops(frames, iterations):
+    import cv2
+
+    results = {}
+    results["color_convert"] = measure(lambda f: cv2.cvtColor(f, cv2.COLOR_BGR2RGB), frames, iterations)
+    results["downscale_0.25"] = measure(lambda f: cv2.resize(f, (0, 0), fx=0.25, fy=0.25), frames, iterations)
+    results["frame_copy"] = measure(lambda f: f.copy(), frames, iterations)
+    results["jpeg_encode"] = measure(lambda f: cv2.imencode(".jpg", f), frames, iterations)
+    return results
+
+
+def bench_matching(iterations, dims=(128, 512), sizes=GALLERY_SIZES, faces_per_frame=(1, 8)):
+    results = {}
+    for dim in dims:
+        for size in sizes:
+            snapshot, gallery = synthetic_gallery(size, dim)
+            for n in faces_per_frame:
+                rng = np.random.default_rng(size + n)
+                # Queries close to gallery members so both hit and miss paths run
+                queries = [
+                    gallery[rng.integers(0, size, n)] + rng.normal(0, 0.05, (n, dim)).astype(np.float32)
+                    for _ in range(8)
+                ]
+                results[f"match_d{dim}_g{size}_q{n}"] = measure(
+                    lambda q: snapshot.match(q, 0.9), queries, iterations
+                )
+    return results
+
+
+def bench_objects(frames, iterations, weights, allow_download):
+    try:
+        from .detection import ObjectDetector
+        from .registry import get_registry
+    except ImportError as e:
+        raise Skipped(str(e))
+
+    if not allow_download and not get_registry().is_cached(weights):
+        raise Skipped(f"{weights} not in model cache")
+    try:
+        detector = ObjectDetector(weights)
+    except ImportError as e:
+        raise Skipped(str(e))
+    return {f"detect_objects_{os.path.splitext(weights)[0]}": measure(detector.detect, frames, iterations)}
+
+
+def bench_dlib_faces(frames, iterations):
+    try:
+        from .faces import DlibFaceEncoder
+        encoder = DlibFaceEncoder(scale=0.25)
+    except ImportError as e:
+        raise Skipped(str(e))
+    return {
+        "face_locate_dlib_0.25": measure(lambda f: encoder.locate(f), frames, iterations),
+        "detect_faces_dlib_0.25": measure(encoder.detect, frames, iterations),
+    }
+
+
+def bench_facenet(frames, iterations):
+    try:
+        from .faces import FaceNetEmbedder
+        embedder = FaceNetEmbedder()
+    except Exception as e:
+        raise Skipped(str(e))
+    return {"detect_faces_facenet": measure(embedder.detect, frames, iterations)}
+
+
+# ---------------- HTTP ----------------
+def _multipart(field, filename, payload, content_type="image/jpeg"):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _http_requests(base_url, image_bytes):
+    body, content_type = _multipart("image", "frame.jpg", image_bytes)
+    return {
+        "http_health": lambda: urllib.request.Request(f"{base_url}/api/health"),
+        "http_face_list": lambda: urllib.request.Request(f"{base_url}/api/face/list"),
+        "http_detect": lambda: urllib.request.Request(
+            f"{base_url}/api/detect", data=body, headers={"Content-Type": content_type}, method="POST"
+        ),
+    }
+
+
+def load_test(make_request, requests_total, concurrency, timeout=30):
+    """Fire requests_total requests with concurrency workers; latency + errors"""
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(make_request(), timeout=timeout) as resp:
+                resp.read()
+            ok = True
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - t0
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_total)))
+    wall = time.perf_counter() - start
+
+    if not latencies:
+        return {"n": 0, "errors": errors}
+    stats = summarize(latencies, wall)
+    stats["errors"] = errors
+    stats["concurrency"] = concurrency
+    return stats
+
+
+def bench_http(base_url, image_bytes, requests_total, concurrency_levels):
+    try:
+        urllib.request.urlopen(f"{base_url}/api/health", timeout=5).read()
+    except Exception as e:
+        raise Skipped(f"{base_url} unreachable: {e}")
+
+    results = {}
+    for name, make_request in _http_requests(base_url, image_bytes).items():
+        for c in concurrency_levels:
+            results[f"{name}_c{c}"] = load_test(make_request, requests_total, c)
+    return results
+
+
+# ---------------- REPORT ----------------
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "iterations": args.iterations,
+        },
+        "results": {},
+        "skipped": {},
+    }
+
+    def section(name, fn, *fn_args):
+        print(f"[BENCH] {name}...", file=sys.stderr)
+        try:
+            report["results"].update(fn(*fn_args))
+        except Skipped as e:
+            report["skipped"][name] = str(e)
+        except ImportError as e:
+            report["skipped"][name] = str(e)
+
+    frames = None
+    try:
+        if args.video:
+            frames = load_video(args.video, args.frames)
+        elif args.image:
+            frames = load_frames(args.image, args.frames)
+        else:
+            frames = synthetic_clip(args.frames)
+    except (ImportError, FileNotFoundError, ValueError) as e:
+        report["skipped"]["frames"] = str(e)
+    report["meta"]["frames"] = args.video or args.image or "synthetic"
+
+    section("matching", bench_matching, args.iterations, tuple(args.dims), tuple(args.gallery_sizes))
+    if frames is not None:
+        section("image_ops", bench_image_ops, frames, args.iterations)
+        section("objects", bench_objects, frames, args.model_iterations, args.weights, args.allow_download)
+        section("faces_dlib", bench_dlib_faces, frames, args.model_iterations)
+        if args.facenet:
+            section("faces_facenet", bench_facenet, frames, args.model_iterations)
+    if args.http:
+        if frames is None:
+            report["skipped"]["http"] = "no frames to upload"
+        else:
+            import cv2
+            image_bytes = cv2.imencode(".jpg", frames[0])[1].tobytes()
+            section("http", bench_http, args.http.rstrip("/"), image_bytes, args.requests, args.concurrency)
+
+    return report
+
+
+# Metrics --compare understands; everything else in a result is a count
+LOWER_IS_BETTER = ("mean_ms", "min_ms", "max_ms") + tuple(f"p{p}_ms" for p in PERCENTILES)
+HIGHER_IS_BETTER = ("throughput_per_s",)
+
+
+def compare(base, head, metric="p50_ms", threshold=0.10):
+    """Print per-benchmark change in metric; returns the regressed names.
+
+    A change is a regression when it moves metric the wrong way by more than
+    threshold (slower latency, lower throughput). Benchmarks present in base
+    but not in head are listed separately, with the skip reason if any.
+    """
+    if metric not in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        raise ValueError(f"cannot compare on {metric}")
+    sign = -1.0 if metric in HIGHER_IS_BETTER else 1.0
+
+    regressions, missing = [], []
+    base_results, head_results = base["results"], head["results"]
+    print(f"{'benchmark':45s} {'base':>10s} {'head':>10s} {'change':>8s}")
+    for name in sorted(set(base_results) | set(head_results)):
+        old = base_results.get(name, {}).get(metric)
+        new = head_results.get(name, {}).get(metric)
+        if old is None or new is None:
+            if new is None and old is not None:
+                missing.append(name)
+            note = "  MISSING" if new is None else "  NEW"
+            cells = [f"{v:10.3f}" if v is not None else f"{'-':>10}" for v in (old, new)]
+            print(f"{name:45s} {cells[0]} {cells[1]}{note}")
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if sign * change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:45s} {old:10.3f} {new:10.3f} {change:+8.1%}{flag}")
+
+    if missing:
+        print(f"\n{len(missing)} benchmark(s) missing from head: {', '.join(missing)}")
+        for section, reason in sorted(head.get("skipped", {}).items()):
+            print(f"  skipped {section}: {reason}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Aura perception hot paths")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--video", help="recording or video file to take frames from")
+    parser.add_argument("--image", help="single frame, shifted to simulate a clip")
+    parser.add_argument("--frames", type=int, default=16, help="synthetic video length")
+    parser.add_argument("--iterations", type=int, default=200, help="iterations for cheap stages")
+    parser.add_argument("--model-iterations", type=int, default=30, help="iterations for model stages")
+    parser.add_argument("--gallery-sizes", type=int, nargs="+", default=list(GALLERY_SIZES))
+    parser.add_argument("--dims", type=int, nargs="+", default=[128, 512])
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--allow-download", action="store_true", help="fetch missing weights")
+    parser.add_argument("--facenet", action="store_true", help="include MTCNN + FaceNet")
+    parser.add_argument("--http", help="backend base URL to load test, e.g. http://localhost:5001")
+    parser.add_argument("--requests", type=int, default=100, help="HTTP requests per endpoint and level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="diff two reports")
+    parser.add_argument("--metric", default="p50_ms", choices=LOWER_IS_BETTER + HIGHER_IS_BETTER,
+                        help="metric used by --compare")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            head = json.load(f)
+        return 1 if compare(base, head, args.metric, args.threshold) else 0
+
+    report = run(args)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"[INFO] Benchmark report written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""YOLO object detection through ultralytics."""
+from .registry import get_registry
+from .types import Detection
+
+DEFAULT_WEIGHTS = "yolov8n.pt"
+
+
+def _load_yolo(path):
+    from ultralytics import YOLO
+
+    # ultralytics downloads known assets to the given path when missing,
+    # so the first run warms the cache and later runs stay offline
+    return YOLO(path)
+
+
+class ObjectDetector:
+    def __init__(self, weights=DEFAULT_WEIGHTS, conf=0.25, registry=None):
+        self.registry = registry or get_registry()
+        self.weights = weights
+        self.conf = conf
+        path = self.registry.weights_path(weights)
+        self.model = self.registry.get(("yolo", weights), lambda: _load_yolo(path))
+        # The model is shared process-wide and its predictor is not thread safe
+        self._lock = self.registry.lock(("yolo", weights))
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def detect(self, frame, conf=None):
+        """Run YOLO on a BGR frame and return a list of Detection"""
+        with self._lock:
+            results = self.model(frame, conf=self.conf if conf is None else conf, verbose=False)[0]
+        boxes = results.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        xyxy = boxes.xyxy.cpu().numpy().astype(int)
+        confs = boxes.conf.cpu().numpy()
+        classes = boxes.cls.cpu().numpy().astype(int)
+
+        return [
+            Detection(self.names[c], float(p), [int(v) for v in box])
+            for box, p, c in zip(xyxy, confs, classes)
+        ]
@@ -0,0 +1,140 @@
+"""Face location and embedding backends."""
+import cv2
+import numpy as np
+
+from .registry import get_registry
+from .types import FaceDetection
+
+
+def sharpness(image):
+    """Variance of the Laplacian; low values mean a blurry image"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+class FaceNetEmbedder:
+    """MTCNN + InceptionResnetV1 (512-d embeddings, euclidean distance)"""
+
+    def __init__(self, pretrained="vggface2", registry=None):
+        self.registry = registry or get_registry()
+        self.mtcnn = self.registry.get(("mtcnn",), self._load_mtcnn)
+        self.facenet = self.registry.get(
+            ("facenet", pretrained), lambda: self._load_facenet(pretrained)
+        )
+
+    @staticmethod
+    def _load_mtcnn():
+        from facenet_pytorch import MTCNN
+        return MTCNN(keep_all=True)
+
+    @staticmethod
+    def _load_facenet(pretrained):
+        from facenet_pytorch import InceptionResnetV1
+        return InceptionResnetV1(pretrained=pretrained).eval()
+
+    def embed(self, face):
+        """Embed a single aligned face tensor as returned by MTCNN"""
+        return self.embed_batch(face.unsqueeze(0))[0]
+
+    def embed_batch(self, faces):
+        """Embed an (N, 3, 160, 160) stack of aligned faces in one forward pass"""
+        import torch
+
+        with torch.no_grad():
+            return self.facenet(faces).numpy()
+
+    def detect(self, frame):
+        """Run MTCNN once, returning FaceDetection with their embeddings.
+
+        Boxes and aligned crops both come from the same detection pass and
+        every crop is embedded in a single batched forward.
+        """
+        boxes, probs = self.mtcnn.detect(frame)
+        if boxes is None:
+            return []
+
+        crops = self.mtcnn.extract(frame, boxes, None)
+        if crops is None:
+            return []
+        if crops.dim() == 3:
+            crops = crops.unsqueeze(0)
+
+        embeddings = self.embed_batch(crops)
+        return [
+            FaceDetection(
+                bbox=[int(v) for v in box],
+                embedding=emb,
+                confidence=float(prob),
+            )
+            for box, prob, emb in zip(boxes, probs, embeddings)
+        ]
+
+
+class DlibFaceEncoder:
+    """face_recognition / dlib (128-d encodings, HOG locator)"""
+
+    def __init__(self, scale=0.25, registry=None):
+        self.registry = registry or get_registry()
+        self.fr = self.registry.get(("face_recognition",), self._load_face_recognition)
+        self.scale = scale
+
+    @staticmethod
+    def _load_face_recognition():
+        # face_recognition loads its dlib detector and encoder models on import
+        import face_recognition
+        return face_recognition
+
+    def prepare(self, frame, scale=None):
+        """BGR frame -> RGB image at the locator's reduced resolution"""
+        scale = self.scale if scale is None else scale
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if scale != 1:
+            rgb = cv2.resize(rgb, (0, 0), fx=scale, fy=scale)
+        return rgb
+
+    def locate(self, frame, scale=None):
+        """Locate faces in a BGR frame at reduced resolution.
+
+        Returns the RGB image the locations refer to and the locations in
+        face_recognition's (top, right, bottom, left) order.
+        """
+        rgb = self.prepare(frame, scale)
+        return rgb, self.fr.face_locations(rgb)
+
+    def encode(self, rgb, locations, scale=None):
+        """Encode located faces, returning FaceDetection in frame coordinates"""
+        scale = self.scale if scale is None else scale
+        encodings = self.fr.face_encodings(rgb, locations)
+
+        faces = []
+        for encoding, (top, right, bottom, left) in zip(encodings, locations):
+            bbox = [int(v / scale) for v in (left, top, right, bottom)]
+            faces.append(FaceDetection(bbox=bbox, embedding=np.asarray(encoding)))
+        return faces
+
+    def detect(self, frame, scale=None):
+        """Locate and encode every face, returning FaceDetection in frame coordinates"""
+        rgb, locations = self.locate(frame, scale)
+        return self.encode(rgb, locations, scale)
+
+    def crop(self, frame, location, scale=None, margin=0.2):
+        """Cut a located face out of the full-resolution BGR frame.
+
+        location is in the downscaled image returned by locate(). Returns
+        the crop and the face location relative to it.
+        """
+        scale = self.scale if scale is None else scale
+        top, right, bottom, left = [int(v / scale) for v in location]
+        pad_y = int((bottom - top) * margin)
+        pad_x = int((right - left) * margin)
+        height, width = frame.shape[:2]
+        y0, y1 = max(0, top - pad_y), min(height, bottom + pad_y)
+        x0, x1 = max(0, left - pad_x), min(width, right + pad_x)
+        crop = frame[y0:y1, x0:x1]
+        return crop, (top - y0, right - x0, bottom - y0, left - x0)
+
+    def encode_crop(self, crop, location):
+        """Encode one face from a full-resolution BGR crop"""
+        rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        encodings = self.fr.face_encodings(rgb, [location])
+        return np.asarray(encodings[0]) if encodings else None
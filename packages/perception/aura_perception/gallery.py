@@ -0,0 +1,191 @@
+"""Per-identity face prototypes and the concurrent gallery that holds them."""
+import atexit
+import threading
+from types import MappingProxyType
+
+import numpy as np
+
+from .matching import match_embeddings
+from .registry import log
+
+MAX_EXEMPLARS = 3
+
+
+def select_exemplars(samples, mean, k=MAX_EXEMPLARS):
+    """Pick up to k mutually distant samples, starting from the most typical one"""
+    samples = np.asarray(samples)
+    if len(samples) <= k:
+        return samples.copy()
+
+    chosen = [int(np.argmin(np.linalg.norm(samples - mean, axis=1)))]
+    nearest = np.linalg.norm(samples - samples[chosen[0]], axis=1)
+    while len(chosen) < k:
+        idx = int(np.argmax(nearest))
+        chosen.append(idx)
+        nearest = np.minimum(nearest, np.linalg.norm(samples - samples[idx], axis=1))
+    return samples[chosen]
+
+
+class FacePrototype:
+    def __init__(self, mean, exemplars, count):
+        self.mean = np.asarray(mean)
+        self.exemplars = np.asarray(exemplars)
+        self.count = int(count)
+
+    @classmethod
+    def from_samples(cls, samples, k=MAX_EXEMPLARS):
+        samples = np.asarray(samples)
+        mean = samples.mean(axis=0)
+        return cls(mean, select_exemplars(samples, mean, k), len(samples))
+
+    def merge(self, samples, k=MAX_EXEMPLARS):
+        """New prototype combining this one with more samples of the same person"""
+        samples = np.asarray(samples)
+        count = self.count + len(samples)
+        mean = (self.mean * self.count + samples.sum(axis=0)) / count
+        pool = np.vstack([self.exemplars, samples])
+        return FacePrototype(mean, select_exemplars(pool, mean, k), count)
+
+    def vectors(self):
+        """Rows matched against: the mean first, then the exemplars"""
+        if self.count <= 1:
+            return self.mean[None, :]
+        return np.vstack([self.mean[None, :], self.exemplars])
+
+    def to_dict(self):
+        return {"mean": self.mean, "exemplars": self.exemplars, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["mean"], data["exemplars"], data["count"])
+
+
+def prototypes_from_flat(encodings, names, k=MAX_EXEMPLARS):
+    """Group a legacy flat (encodings, names) gallery into prototypes"""
+    grouped = {}
+    for encoding, name in zip(encodings, names):
+        grouped.setdefault(name, []).append(encoding)
+    return {name: FacePrototype.from_samples(samples, k) for name, samples in grouped.items()}
+
+
+def flatten_prototypes(prototypes):
+    """Stack every prototype's vectors into one matrix with a parallel name list"""
+    if not prototypes:
+        return np.empty((0, 0)), []
+    rows, names = [], []
+    for name, proto in prototypes.items():
+        vectors = proto.vectors()
+        rows.append(vectors)
+        names.extend([name] * len(vectors))
+    return np.vstack(rows), names
+
+
+class GallerySnapshot:
+    """Immutable, versioned view of a gallery.
+
+    Everything a reader needs (the match matrix with its squared norms,
+    the parallel row names and the identity list) is built once when the
+    version is published, so matching never takes a lock.
+    """
+
+    def __init__(self, version, prototypes):
+        self.version = version
+        self.prototypes = MappingProxyType(dict(prototypes))
+        self.identities = tuple(prototypes)
+
+        matrix, names = flatten_prototypes(prototypes)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.matrix.setflags(write=False)
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        self.sq_norms.setflags(write=False)
+        self.names = tuple(names)
+
+    def __len__(self):
+        return len(self.identities)
+
+    def match(self, queries, threshold, unknown="Unknown"):
+        """Nearest identity for every query embedding; see match_embeddings"""
+        return match_embeddings(
+            queries, self.matrix, self.names, threshold, unknown=unknown,
+            gallery_sq_norms=self.sq_norms
+        )
+
+
+class FaceGallery:
+    """Copy-on-write face gallery for concurrent readers.
+
+    Readers grab ``gallery.snapshot`` (a single reference read) and match
+    against it. Writers serialize on a lock, build the next snapshot from a
+    copy of the current prototypes and publish it with one assignment, so
+    a reader sees either the old or the new version, never a mix. persist,
+    if given, is called with the newest snapshot on a background thread;
+    bursts of writes are coalesced into one save.
+    """
+
+    def __init__(self, persist=None, max_exemplars=MAX_EXEMPLARS):
+        self.max_exemplars = max_exemplars
+        self.snapshot = GallerySnapshot(0, {})
+        self._persist = persist
+        self._write_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._saved_version = 0
+        self._persist_lock = threading.Lock()
+
+        if persist is not None:
+            threading.Thread(target=self._persist_loop, name="gallery-persist", daemon=True).start()
+            # Don't lose an enrollment that is still waiting to be saved
+            atexit.register(self.flush)
+
+    def _publish(self, prototypes, persist=True):
+        self.snapshot = GallerySnapshot(self.snapshot.version + 1, prototypes)
+        if persist and self._persist is not None:
+            self._dirty.set()
+        return self.snapshot
+
+    def load(self, prototypes):
+        """Replace the contents without scheduling a save (e.g. after reading from disk)"""
+        with self._write_lock:
+            snapshot = self._publish(prototypes, persist=False)
+            # What was just read is already on disk
+            with self._persist_lock:
+                self._saved_version = snapshot.version
+            return snapshot
+
+    def enroll(self, name, samples):
+        """Add samples for name, merging into an existing prototype"""
+        with self._write_lock:
+            prototypes = dict(self.snapshot.prototypes)
+            if name in prototypes:
+                prototypes[name] = prototypes[name].merge(samples, self.max_exemplars)
+            else:
+                prototypes[name] = FacePrototype.from_samples(samples, self.max_exemplars)
+            return self._publish(prototypes)
+
+    def remove(self, name):
+        """Drop an identity; returns False if it was not enrolled"""
+        with self._write_lock:
+            if name not in self.snapshot.prototypes:
+                return False
+            prototypes = dict(self.snapshot.prototypes)
+            del prototypes[name]
+            self._publish(prototypes)
+            return True
+
+    def _persist_loop(self):
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            self.flush()
+
+    def flush(self):
+        """Save the current snapshot now if it has not been saved yet"""
+        with self._persist_lock:
+            snapshot = self.snapshot
+            if snapshot.version <= self._saved_version:
+                return
+            try:
+                self._persist(snapshot)
+            except Exception as e:
+                log(f"[ERROR] Saving face gallery failed: {e}")
+                return
+            self._saved_version = snapshot.version
@@ -0,0 +1,269 @@
+"""Rule-based hazard detection on top of object detections.
+
+Distances come from box geometry (pinhole model with typical object
+heights) unless a depth reading is supplied: a scalar such as a single-point
+LiDAR range applies to boxes covering the image centre, a depth map (metres
+per pixel) is sampled inside each box. Detections are associated across
+frames by IoU so closing speed can be estimated, and hazards only activate
+after a few consecutive frames and clear after a few misses (hysteresis).
+Alerts are rate limited per tracked object and hazard kind (an escalation
+in severity is announced despite the cooldown), dropped when the frame they
+describe is older than the latency budget, and carry a deadline after which
+the speech queue should discard them.
+"""
+import math
+import time
+
+import numpy as np
+
+# Typical real-world heights in metres for COCO classes we reason about
+OBJECT_HEIGHTS_M = {
+    "person": 1.7, "bicycle": 1.1, "car": 1.5, "motorcycle": 1.2, "bus": 3.2,
+    "truck": 3.0, "train": 3.8, "dog": 0.6, "horse": 1.6, "cow": 1.4,
+    "chair": 0.9, "bench": 0.8, "couch": 0.9, "dining table": 0.75, "bed": 0.6,
+    "potted plant": 0.6, "fire hydrant": 0.8, "stop sign": 2.1, "parking meter": 1.3,
+    "suitcase": 0.7, "toilet": 0.8, "tv": 0.6, "refrigerator": 1.8,
+    # Not a COCO class: lets callers range face boxes the same way
+    "face": 0.24,
+}
+DEFAULT_HEIGHT_M = 1.0
+
+VEHICLES = {"car", "bus", "truck", "motorcycle", "bicycle", "train"}
+
+SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+
+
+def _iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class DistanceEstimator:
+    def __init__(self, hfov_deg=60.0, heights=None):
+        self.hfov_deg = hfov_deg
+        self.heights = dict(OBJECT_HEIGHTS_M, **(heights or {}))
+
+    def focal_px(self, frame_width):
+        return (frame_width / 2.0) / math.tan(math.radians(self.hfov_deg) / 2.0)
+
+    def estimate(self, label, bbox, frame_shape, depth=None):
+        """Distance in metres to the object in bbox"""
+        x1, y1, x2, y2 = bbox
+        height, width = frame_shape[:2]
+
+        if depth is not None:
+            if np.ndim(depth) == 0:
+                # Single-point range finder aimed at the image centre
+                if x1 <= width / 2 <= x2 and y1 <= height / 2 <= y2:
+                    return float(depth)
+            else:
+                region = np.asarray(depth)[max(0, y1):y2, max(0, x1):x2]
+                valid = region[np.isfinite(region) & (region > 0)]
+                if valid.size:
+                    return float(np.median(valid))
+
+        box_h = max(1, y2 - y1)
+        real_h = self.heights.get(label, DEFAULT_HEIGHT_M)
+        return real_h * self.focal_px(width) / box_h
+
+
+class _Track:
+    __slots__ = ("id", "label", "bbox", "distance", "speed", "timestamp", "misses", "streaks")
+
+    def __init__(self, track_id, label, bbox, distance, timestamp):
+        self.id = track_id
+        self.label = label
+        self.bbox = bbox
+        self.distance = distance
+        self.speed = 0.0  # closing speed in m/s, positive when approaching
+        self.timestamp = timestamp
+        self.misses = 0
+        self.streaks = {}
+
+
+class HazardResult:
+    def __init__(self, objects, hazards, alerts):
+        self.objects = objects
+        self.hazards = hazards
+        self.alerts = alerts
+
+
+class HazardEngine:
+    def __init__(self, hfov_deg=60.0, path_width=0.4, obstacle_distance_m=2.0,
+                 vehicle_distance_m=4.0, vehicle_watch_m=12.0, approach_speed_mps=1.0,
+                 activate_frames=2, clear_frames=3, exit_ratio=1.25,
+                 cooldown_s=6.0, min_alert_interval_s=1.5, latency_budget_s=0.5,
+                 speak_budget_s=1.5, critical_ttc_s=3.0, smoothing=0.5):
+        self.estimator = DistanceEstimator(hfov_deg)
+        self.path_width = path_width
+        self.obstacle_distance_m = obstacle_distance_m
+        self.vehicle_distance_m = vehicle_distance_m
+        self.vehicle_watch_m = vehicle_watch_m
+        self.approach_speed_mps = approach_speed_mps
+        self.activate_frames = activate_frames
+        self.clear_frames = clear_frames
+        self.exit_ratio = exit_ratio
+        self.cooldown_s = cooldown_s
+        self.min_alert_interval_s = min_alert_interval_s
+        self.latency_budget_s = latency_budget_s
+        self.speak_budget_s = speak_budget_s
+        self.critical_ttc_s = critical_ttc_s
+        self.smoothing = smoothing
+
+        self._tracks = []
+        self._next_id = 0
+        self._active = {}
+        self._last_alert = {}
+        self._last_any_alert = -math.inf
+
+    # ---------------- TRACKING ----------------
+    def _associate(self, detections, distances, timestamp):
+        unmatched = list(self._tracks)
+        tracks = []
+        for det, distance in zip(detections, distances):
+            best, best_iou = None, 0.3
+            for track in unmatched:
+                if track.label != det.label:
+                    continue
+                overlap = _iou(track.bbox, det.bbox)
+                if overlap > best_iou:
+                    best, best_iou = track, overlap
+
+            if best is None:
+                best = _Track(self._next_id, det.label, det.bbox, distance, timestamp)
+                self._next_id += 1
+            else:
+                unmatched.remove(best)
+                dt = timestamp - best.timestamp
+                if dt > 0:
+                    speed = (best.distance - distance) / dt
+                    best.speed = self.smoothing * best.speed + (1 - self.smoothing) * speed
+                best.bbox, best.distance, best.timestamp, best.misses = det.bbox, distance, timestamp, 0
+            tracks.append(best)
+
+        # Keep unseen tracks around briefly so hysteresis can clear them
+        for track in unmatched:
+            track.misses += 1
+            if track.misses <= self.clear_frames:
+                tracks.append(track)
+        self._tracks = tracks
+        return tracks
+
+    # ---------------- RULES ----------------
+    def _in_path(self, bbox, frame_shape):
+        width = frame_shape[1]
+        left = width * (0.5 - self.path_width / 2)
+        right = width * (0.5 + self.path_width / 2)
+        return bbox[2] > left and bbox[0] < right
+
+    def _candidates(self, track, frame_shape):
+        """Hazards this track raises on the current frame: {kind: (severity, message)}"""
+        found = {}
+        label, distance = track.label, track.distance
+        active = lambda kind: (track.id, kind) in self._active
+        margin = lambda kind: self.exit_ratio if active(kind) else 1.0
+
+        if label in VEHICLES:
+            near = distance < self.vehicle_distance_m * margin("approaching_vehicle")
+            closing = (distance < self.vehicle_watch_m * margin("approaching_vehicle")
+                       and track.speed > self.approach_speed_mps)
+            if near or closing:
+                # Critical when close or when it would arrive within a few seconds
+                time_to_contact = distance / track.speed if track.speed > 0 else math.inf
+                critical = distance < self.vehicle_distance_m or time_to_contact < self.critical_ttc_s
+                severity = "critical" if critical else "warning"
+                found["approaching_vehicle"] = (severity, f"{label} approaching, {distance:.0f} meters")
+
+        if (label not in VEHICLES and self._in_path(track.bbox, frame_shape)
+                and distance < self.obstacle_distance_m * margin("obstacle_in_path")):
+            severity = "critical" if distance < self.obstacle_distance_m / 2 else "warning"
+            found["obstacle_in_path"] = (severity, f"{label} ahead, {distance:.1f} meters")
+
+        return found
+
+    def update(self, detections, frame_shape, timestamp=None, depth=None, now=None):
+        """Process one frame of detections.
+
+        Returns a HazardResult with per-detection distances (objects), the
+        currently active hazards and the alerts that should be spoken now.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        distances = [self.estimator.estimate(d.label, d.bbox, frame_shape, depth) for d in detections]
+        tracks = self._associate(detections, distances, timestamp)
+
+        seen = set()
+        for track in tracks:
+            candidates = {} if track.misses else self._candidates(track, frame_shape)
+            # Streaks count consecutive frames: any kind not raised this frame starts over
+            track.streaks = {kind: track.streaks.get(kind, 0) + 1 for kind in candidates}
+            for kind, (severity, message) in candidates.items():
+                key = (track.id, kind)
+                seen.add(key)
+                streak = track.streaks[kind]
+                if key in self._active or streak >= self.activate_frames:
+                    self._active[key] = {
+                        "type": kind,
+                        "label": track.label,
+                        "distance_m": round(track.distance, 2),
+                        "closing_speed_mps": round(track.speed, 2),
+                        "severity": severity,
+                        "message": message,
+                        "bbox": list(track.bbox),
+                        "track_id": track.id,
+                        "misses": 0,
+                    }
+
+        # Hysteresis on the way out: clear only after several missed frames
+        for key in list(self._active):
+            if key in seen:
+                continue
+            hazard = self._active[key]
+            hazard["misses"] += 1
+            if hazard["misses"] >= self.clear_frames:
+                del self._active[key]
+
+        hazards = [
+            {k: v for k, v in h.items() if k != "misses"}
+            for h in self._active.values()
+        ]
+        hazards.sort(key=lambda h: (-SEVERITY_RANK[h["severity"]], h["distance_m"]))
+
+        alerts = self._select_alerts(hazards, timestamp, time.time() if now is None else now)
+        objects = [
+            {"name": d.label, "distance_m": round(dist, 2), "bbox": list(d.bbox)}
+            for d, dist in zip(detections, distances)
+        ]
+        return HazardResult(objects, hazards, alerts)
+
+    def _select_alerts(self, hazards, timestamp, now):
+        # A stale frame describes a world that has already moved on
+        if now - timestamp > self.latency_budget_s:
+            return []
+
+        # Forget tracks whose cooldown has run out
+        self._last_alert = {
+            key: spoken for key, spoken in self._last_alert.items()
+            if now - spoken[0] < self.cooldown_s
+        }
+
+        alerts = []
+        for hazard in hazards:
+            key = (hazard["track_id"], hazard["type"])
+            rank = SEVERITY_RANK[hazard["severity"]]
+            last_time, last_rank = self._last_alert.get(key, (-math.inf, -1))
+            # Within the cooldown only an escalation is announced again
+            if now - last_time < self.cooldown_s and rank <= last_rank:
+                continue
+            # Critical alerts may interrupt the global spacing, others wait
+            if (hazard["severity"] != "critical"
+                    and now - self._last_any_alert < self.min_alert_interval_s):
+                continue
+            self._last_alert[key] = (now, rank)
+            self._last_any_alert = now
+            # Spoken after this wall-clock time the alert is dropped instead
+            alerts.append(dict(hazard, deadline=timestamp + self.speak_budget_s))
+            break  # one alert per frame keeps speech intelligible
+        return alerts
@@ -0,0 +1,45 @@
+"""Vectorized nearest-neighbour matching against a face gallery."""
+import numpy as np
+
+
+def euclidean_distances(queries, gallery, gallery_sq_norms=None):
+    """(N, D) x (M, D) -> (N, M) euclidean distance matrix.
+
+    gallery_sq_norms lets callers that match against the same gallery many
+    times pass its precomputed squared row norms.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    gallery = np.asarray(gallery, dtype=np.float32)
+    if gallery_sq_norms is None:
+        gallery_sq_norms = np.einsum("ij,ij->i", gallery, gallery)
+
+    # |q - g|^2 = |q|^2 + |g|^2 - 2 q.g, one GEMM instead of N*M subtractions
+    sq = (
+        np.einsum("ij,ij->i", queries, queries)[:, None]
+        + gallery_sq_norms[None, :]
+        - 2.0 * queries @ gallery.T
+    )
+    return np.sqrt(np.maximum(sq, 0.0))
+
+
+def match_embeddings(queries, gallery, names, threshold, unknown="unknown", gallery_sq_norms=None):
+    """Match every query against the gallery at once.
+
+    Returns (labels, distances) where labels[i] is the nearest gallery name
+    if it lies within threshold, otherwise unknown.
+    """
+    queries = np.asarray(queries)
+    if len(queries) == 0:
+        return [], np.empty(0, dtype=np.float32)
+    if len(gallery) == 0:
+        return [unknown] * len(queries), np.full(len(queries), np.inf, dtype=np.float32)
+
+    dists = euclidean_distances(queries, gallery, gallery_sq_norms)
+    nearest = np.argmin(dists, axis=1)
+    best = dists[np.arange(len(queries)), nearest]
+
+    labels = [
+        names[idx] if dist < threshold else unknown
+        for idx, dist in zip(nearest, best)
+    ]
+    return labels, best
@@ -0,0 +1,153 @@
+"""Threaded building blocks for running perception as a staged pipeline."""
+import threading
+import time
+from collections import deque
+
+from .registry import log
+
+
+class LatestQueue:
+    """Bounded hand-off between stages that only keeps the newest item.
+
+    A slow consumer never builds a backlog: putting into a full queue
+    replaces the pending item and counts it as dropped.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._last = None
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._last = item
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Take the pending item, waiting up to timeout; None if nothing arrived"""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def peek(self):
+        """Most recent item ever put, without consuming it"""
+        with self._cond:
+            return self._last
+
+
+class Frame:
+    __slots__ = ("index", "timestamp", "image")
+
+    def __init__(self, index, timestamp, image):
+        self.index = index
+        self.timestamp = timestamp
+        self.image = image
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from a cv2.VideoCapture-like source and fans them out.
+
+    finished is set when a finite source (a replayed recording) runs out.
+    """
+
+    def __init__(self, source, outputs):
+        super().__init__(name="capture", daemon=True)
+        self.source = source
+        self.outputs = list(outputs)
+        self.frames = 0
+        self.finished = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            ret, image = self.source.read()
+            if not ret:
+                if getattr(self.source, "exhausted", False):
+                    break
+                time.sleep(0.005)
+                continue
+
+            frame = Frame(self.frames, time.time(), image)
+            self.frames += 1
+            for queue in self.outputs:
+                queue.put(frame)
+        self.finished.set()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class Stage(threading.Thread):
+    """Worker that applies fn to each item of inbox and publishes to outbox.
+
+    For Frame items the capture-to-result latency of the most recent
+    results is kept in latencies (seconds).
+    """
+
+    def __init__(self, name, fn, inbox, outbox, history=10000):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.processed = 0
+        self.latencies = deque(maxlen=history)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            item = self.inbox.get(timeout=0.1)
+            if item is None:
+                continue
+            try:
+                result = self.fn(item)
+            except Exception as e:
+                log(f"[ERROR] Stage {self.name}: {e}")
+                continue
+            self.processed += 1
+            if isinstance(item, Frame):
+                self.latencies.append(time.time() - item.timestamp)
+            self.outbox.put(result)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class PeriodicValue:
+    """Keeps the result of a slow call cached, refreshing it in the background"""
+
+    def __init__(self, fn, interval, name="refresh"):
+        self.fn = fn
+        self.interval = interval
+        self._value = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                value = self.fn()
+            except Exception as e:
+                log(f"[ERROR] {self._thread.name}: {e}")
+            else:
+                with self._lock:
+                    self._value = value
+            self._stop_event.wait(self.interval)
+
+    @property
+    def value(self):
+        with self._lock:
+            return self._value
+
+    def stop(self):
+        self._stop_event.set()
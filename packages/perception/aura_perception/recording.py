@@ -0,0 +1,299 @@
+"""Record camera sessions to disk and replay them as a fake camera.
+
+File layout (little endian)::
+
+    b"AURAREC1" | u32 meta_len | meta JSON
+    then per frame: f64 timestamp | u32 jpeg_len | jpeg bytes
+
+The reader memory-maps the file and indexes frame offsets once, so replay
+only pays for JPEG decoding. ReplayCapture mimics cv2.VideoCapture, so it
+can be dropped into any capture loop:
+
+    python -m aura_perception.recording record session.aurarec --seconds 30
+    python -m aura_perception.recording info session.aurarec
+    AURA_CAMERA=session.aurarec AURA_REPLAY_SPEED=0 python webcam_perception.py
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from .registry import log
+
+MAGIC = b"AURAREC1"
+_META = struct.Struct("<I")
+_FRAME = struct.Struct("<dI")
+
+
+class Recorder:
+    def __init__(self, path, quality=90, meta=None):
+        self.path = path
+        self.quality = quality
+        self.frames = 0
+        self._file = open(path, "wb")
+        header = json.dumps(dict(meta or {}, created=time.time(), quality=quality)).encode("utf-8")
+        self._file.write(MAGIC + _META.pack(len(header)) + header)
+
+    def write(self, frame, timestamp=None):
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        data = buffer.tobytes()
+        timestamp = time.time() if timestamp is None else timestamp
+        self._file.write(_FRAME.pack(timestamp, len(data)) + data)
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """Random access to the frames of a recording file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index()
+        except Exception:
+            self.close()
+            raise
+
+    def _index(self):
+        """Parse the header and record where every complete frame lives"""
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not an Aura recording")
+        offset = len(MAGIC)
+        (meta_len,) = _META.unpack_from(self._map, offset)
+        offset += _META.size
+        self.meta = json.loads(self._map[offset:offset + meta_len])
+        offset += meta_len
+
+        timestamps, self._spans = [], []
+        size = len(self._map)
+        while offset + _FRAME.size <= size:
+            timestamp, length = _FRAME.unpack_from(self._map, offset)
+            start = offset + _FRAME.size
+            if start + length > size:
+                break  # truncated last frame from an interrupted recording
+            timestamps.append(timestamp)
+            self._spans.append((start, length))
+            offset = start + length
+        self.timestamps = np.asarray(timestamps)
+
+    def __len__(self):
+        return len(self._spans)
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) > 1 else 0.0
+
+    @property
+    def fps(self):
+        return (len(self) - 1) / self.duration if self.duration > 0 else 0.0
+
+    def frame(self, index):
+        start, length = self._spans[index]
+        data = np.frombuffer(self._map, dtype=np.uint8, count=length, offset=start)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+        self._file.close()
+
+
+class ReplayCapture:
+    """cv2.VideoCapture stand-in that plays a recording.
+
+    speed=1 replays in real time, >1 accelerated, 0 as fast as frames are
+    read. At a non-zero speed a slow reader skips frames that are already
+    overdue, like a live camera would; at speed 0 every frame is delivered.
+    Like VideoCapture, a missing or unreadable file does not raise:
+    isOpened() returns False and read() returns (False, None).
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.speed = speed
+        self.loop = loop
+        self.index = 0
+        self.delivered = 0
+        self.skipped = 0
+        self._start = None
+        try:
+            self.recording = Recording(path)
+        except (OSError, ValueError, struct.error) as e:
+            log(f"[ERROR] Cannot open recording {path}: {e}")
+            self.recording = None
+            self.exhausted = True
+            self._released = True
+            return
+        self.exhausted = len(self.recording) == 0
+        self._released = False
+
+    def isOpened(self):
+        return not self._released
+
+    def _due_index(self, now):
+        """Index of the newest frame whose replay time has come"""
+        elapsed = (now - self._start) * self.speed
+        target = self.recording.timestamps[0] + elapsed
+        return int(np.searchsorted(self.recording.timestamps, target, side="right")) - 1
+
+    def read(self):
+        if self.exhausted:
+            return False, None
+
+        if self.speed > 0:
+            now = time.perf_counter()
+            if self._start is None:
+                self._start = now
+            due = self._due_index(now)
+            if due > self.index:
+                self.skipped += due - self.index
+                self.index = due
+            elif due < self.index:
+                # Wait until this frame's recorded time comes round
+                wait = (self.recording.timestamps[self.index] - self.recording.timestamps[0]) / self.speed
+                time.sleep(max(0.0, self._start + wait - now))
+
+        if self.index >= len(self.recording):
+            return self._end()
+
+        frame = self.recording.frame(self.index)
+        self.index += 1
+        self.delivered += 1
+        if self.index >= len(self.recording):
+            self._end()
+        return frame is not None, frame
+
+    def _end(self):
+        if self.loop:
+            self.index = 0
+            self._start = None
+        else:
+            self.exhausted = True
+        return False, None
+
+    def get(self, prop):
+        if self.recording is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FPS:
+            return self.recording.fps * (self.speed or 1)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.recording)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.index
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.exhausted = True
+            self.recording.close()
+
+
+def open_capture(source=None, speed=None):
+    """Open a camera index or a recording.
+
+    source defaults to AURA_CAMERA (or camera 0); a path to a recording is
+    replayed at AURA_REPLAY_SPEED (default real time).
+    """
+    source = os.getenv("AURA_CAMERA", "0") if source is None else str(source)
+    if source.isdigit():
+        return cv2.VideoCapture(int(source))
+
+    speed = float(os.getenv("AURA_REPLAY_SPEED", "1")) if speed is None else speed
+    log(f"[INFO] Replaying {source} at speed {speed or 'max'}")
+    return ReplayCapture(source, speed=speed, loop=os.getenv("AURA_REPLAY_LOOP", "0") == "1")
+
+
+# ---------------- CLI ----------------
+def _record(args):
+    cap = cv2.VideoCapture(args.camera)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open camera {args.camera}")
+
+    deadline = time.time() + args.seconds
+    with Recorder(args.path, quality=args.quality, meta={"camera": args.camera}) as rec:
+        while time.time() < deadline:
+            ret, frame = cap.read()
+            if ret:
+                rec.write(frame)
+        frames = rec.frames
+    cap.release()
+    log(f"[INFO] Recorded {frames} frames to {args.path}")
+
+
+def _info(args):
+    recording = Recording(args.path)
+    print(json.dumps({
+        "frames": len(recording),
+        "duration_s": round(recording.duration, 3),
+        "fps": round(recording.fps, 2),
+        "bytes": os.path.getsize(args.path),
+        "meta": recording.meta,
+    }, indent=2))
+    recording.close()
+
+
+def _import_video(args):
+    """Convert a regular video file into a recording, keeping its frame timing"""
+    cap = cv2.VideoCapture(args.video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    with Recorder(args.path, quality=args.quality, meta={"source": args.video}) as rec:
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            rec.write(frame, timestamp=index / fps)
+            index += 1
+    cap.release()
+    log(f"[INFO] Imported {index} frames from {args.video}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and inspect Aura camera sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="record from a camera")
+    record.add_argument("path")
+    record.add_argument("--camera", type=int, default=0)
+    record.add_argument("--seconds", type=float, default=30)
+    record.add_argument("--quality", type=int, default=90)
+    record.set_defaults(fn=_record)
+
+    info = sub.add_parser("info", help="show a recording's frame count and rate")
+    info.add_argument("path")
+    info.set_defaults(fn=_info)
+
+    convert = sub.add_parser("import", help="convert a video file into a recording")
+    convert.add_argument("video")
+    convert.add_argument("path")
+    convert.add_argument("--quality", type=int, default=90)
+    convert.set_defaults(fn=_import_video)
+
+    args = parser.parse_args(argv)
+    args.fn(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Process-wide model registry backed by a local weights cache."""
+import os
+import sys
+import threading
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aura", "models")
+
+
+def log(message):
+    """Log to stderr so workers that speak JSON on stdout stay parseable"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def model_dir():
+    """Return the directory weights are cached in, creating it if needed"""
+    path = os.environ.get("AURA_MODEL_DIR", DEFAULT_MODEL_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class ModelRegistry:
+    def __init__(self, root=None):
+        self.root = root or model_dir()
+        self._models = {}
+        self._model_locks = {}
+        self._lock = threading.Lock()
+
+        # facenet-pytorch and torch.hub download into the torch hub dir
+        os.environ.setdefault("TORCH_HOME", os.path.join(self.root, "torch"))
+
+    def weights_path(self, name):
+        """Absolute path of a weights file inside the cache"""
+        return os.path.join(self.root, name)
+
+    def is_cached(self, name):
+        return os.path.exists(self.weights_path(name))
+
+    def get(self, key, loader):
+        """Return the model stored under key, loading it once on first use"""
+        with self._lock:
+            if key not in self._models:
+                log(f"[INFO] Loading model {key}...")
+                self._models[key] = loader()
+            return self._models[key]
+
+    def lock(self, key):
+        """Lock serializing calls into the shared model under key.
+
+        Cached models are shared by every caller in the process, and some
+        (ultralytics predictors) keep per-call state, so threads that may run
+        the same model concurrently must hold this lock around inference.
+        """
+        with self._lock:
+            return self._model_locks.setdefault(key, threading.Lock())
+
+    def loaded(self):
+        """Keys of the models currently held in memory"""
+        with self._lock:
+            return list(self._models)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the shared registry for this process"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
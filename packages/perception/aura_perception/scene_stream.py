@@ -0,0 +1,257 @@
+"""Streaming scene output as append-only JSON lines.
+
+Every record is one line::
+
+    {"seq": 12, "kind": "full", "scene": {...}}
+    {"seq": 13, "kind": "delta", "timestamp": "...", "changes": {"people": [...]}}
+
+A "full" record carries the whole scene. With delta encoding on, later
+records only carry the top-level keys whose value changed (the timestamp is
+always included and never counts as a change), and a full record is repeated
+every keyframe_interval records and at the start of every rotated file, so a
+reader can start from any file or join a socket mid-stream. seq keeps
+increasing across restarts: a new emitter resumes after the last record
+already in the file (or its newest backup).
+"""
+import json
+import os
+import socket
+import threading
+
+from .registry import log
+
+IGNORED_KEYS = ("timestamp",)
+
+
+def _encode(record):
+    return (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def _last_seq(path, chunk=64 * 1024):
+    """seq of the last complete record in path, or None"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - chunk))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return int(json.loads(line)["seq"])
+        except (ValueError, KeyError, TypeError):
+            continue  # partial line from an interrupted write
+    return None
+
+
+class SceneEmitter:
+    def __init__(self, path=None, delta=False, keyframe_interval=100,
+                 max_bytes=10 * 1024 * 1024, backup_count=5, publisher=None):
+        self.path = path
+        self.delta = delta
+        self.keyframe_interval = keyframe_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.publisher = publisher
+
+        self.seq = 0
+        self._last_scene = None
+        self._since_keyframe = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+        if path:
+            self._resume()
+            self._open()
+
+    def _resume(self):
+        """Continue numbering after an earlier run that appended to the same stream"""
+        for candidate in [self.path] + [f"{self.path}.{i}" for i in range(1, self.backup_count + 1)]:
+            last = _last_seq(candidate)
+            if last is not None:
+                self.seq = last + 1
+                return
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        # A fresh file must start with a full record to be readable alone
+        if self._file.tell() == 0:
+            self._since_keyframe = self.keyframe_interval
+        else:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Terminate a partial line left by an interrupted run
+                    self._file.write(b"\n")
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src, dst = f"{self.path}.{i}", f"{self.path}.{i + 1}"
+            if os.path.exists(src):
+                os.replace(src, dst)
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _build(self, scene):
+        """Return the record for scene, or None if a delta would be empty"""
+        if not self.delta or self._last_scene is None or self._since_keyframe >= self.keyframe_interval:
+            self._since_keyframe = 0
+            return {"seq": self.seq, "kind": "full", "scene": scene}
+
+        changes = {
+            key: value for key, value in scene.items()
+            if key not in IGNORED_KEYS and self._last_scene.get(key) != value
+        }
+        removed = [key for key in self._last_scene if key not in scene]
+        if not changes and not removed:
+            return None
+
+        record = {"seq": self.seq, "kind": "delta", "timestamp": scene.get("timestamp"), "changes": changes}
+        if removed:
+            record["removed"] = removed
+        return record
+
+    def emit(self, scene):
+        """Append one scene; returns the record written, or None if skipped"""
+        with self._lock:
+            if self._file is not None and self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+            record = self._build(scene)
+            if record is None:
+                return None
+
+            line = _encode(record)
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+            if self.publisher is not None:
+                # Subscribers always get a full scene when they connect
+                self.publisher.publish(line, keyframe=_encode({"seq": self.seq, "kind": "full", "scene": scene}))
+
+            self._last_scene = scene
+            self._since_keyframe += 1
+            self.seq += 1
+            return record
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.publisher is not None:
+            self.publisher.close()
+
+
+class ScenePublisher:
+    """Pushes scene lines to every client of a local socket.
+
+    address is a filesystem path (Unix domain socket) or a (host, port)
+    tuple. Clients that cannot keep up within send_timeout are dropped so
+    they never stall the emitter.
+    """
+
+    def __init__(self, address, send_timeout=0.05):
+        self.address = address
+        self.send_timeout = send_timeout
+        self._clients = []
+        self._keyframe = None
+        self._lock = threading.Lock()
+
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen()
+
+        self._thread = threading.Thread(target=self._accept, name="scene-publisher", daemon=True)
+        self._thread.start()
+        log(f"[INFO] Scene publisher listening on {address}")
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            client.settimeout(self.send_timeout)
+            with self._lock:
+                if self._keyframe is not None and not self._send(client, self._keyframe):
+                    continue
+                self._clients.append(client)
+
+    @staticmethod
+    def _send(client, data):
+        try:
+            client.sendall(data)
+            return True
+        except OSError:
+            client.close()
+            return False
+
+    def publish(self, line, keyframe=None):
+        with self._lock:
+            if keyframe is not None:
+                self._keyframe = keyframe
+            self._clients = [c for c in self._clients if self._send(c, line)]
+
+    def close(self):
+        self._server.close()
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients = []
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+def read_scenes(lines):
+    """Rebuild full scenes from an iterable of JSON lines, applying deltas"""
+    scene = None
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # partial line from an interrupted run
+        if record["kind"] == "full":
+            scene = dict(record["scene"])
+        elif scene is not None:
+            scene.update(record["changes"])
+            for key in record.get("removed", ()):
+                scene.pop(key, None)
+            scene["timestamp"] = record.get("timestamp")
+        else:
+            # Delta before any keyframe; wait for the next full record
+            continue
+        yield record["seq"], dict(scene)
+
+
+def _parse_address(value):
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return value
+
+
+def emitter_from_env(default_path="scene.jsonl"):
+    """Build a SceneEmitter from AURA_SCENE_* environment variables.
+
+    AURA_SCENE_STREAM  output file ("" disables the file)
+    AURA_SCENE_DELTA   "1" to enable delta encoding
+    AURA_SCENE_SOCKET  Unix socket path or host:port to publish on
+    """
+    path = os.getenv("AURA_SCENE_STREAM", default_path) or None
+    delta = os.getenv("AURA_SCENE_DELTA", "0") == "1"
+    address = os.getenv("AURA_SCENE_SOCKET")
+    publisher = ScenePublisher(_parse_address(address)) if address else None
+    return SceneEmitter(path, delta=delta, publisher=publisher)
@@ -0,0 +1,36 @@
+"""Result types shared by every detector in the runtime."""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class Detection:
+    """A single object detection; bbox is [x1, y1, x2, y2] in pixels"""
+    label: str
+    confidence: float
+    bbox: List[int]
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "confidence": self.confidence,
+            "bbox": list(self.bbox),
+        }
+
+
+@dataclass
+class FaceDetection:
+    """A located face, its embedding and (once matched) its identity"""
+    bbox: List[int]
+    embedding: Optional[np.ndarray] = None
+    name: str = "Unknown"
+    confidence: float = 1.0
+    extra: dict = field(default_factory=dict)
+
+    def to_dict(self, include_embedding=False):
+        data = {"name": self.name, "bbox": list(self.bbox)}
+        if include_embedding and self.embedding is not None:
+            data["encoding"] = self.embedding
+        return data
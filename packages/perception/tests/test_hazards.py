@@ -0,0 +1,86 @@
+from aura_perception.hazards import HazardEngine
+from aura_perception.types import Detection
+
+FRAME = (480, 640, 3)
+
+
+def chair_at(engine, distance_m, width=200):
+    """A centred chair whose box height puts it distance_m away"""
+    box_h = int(round(0.9 * engine.estimator.focal_px(FRAME[1]) / distance_m))
+    x1, y2 = (FRAME[1] - width) // 2, FRAME[0] - 10
+    return [Detection("chair", 0.9, [x1, y2 - box_h, x1 + width, y2])]
+
+
+def car_at(engine, distance_m, x1=220, width=200):
+    """A car whose box height puts it distance_m away"""
+    box_h = int(round(1.5 * engine.estimator.focal_px(FRAME[1]) / distance_m))
+    y2 = FRAME[0] - 10
+    return [Detection("car", 0.9, [x1, y2 - box_h, x1 + width, y2])]
+
+
+def run(engine, frames, dt=0.1):
+    """Feed one detection list per frame (dt seconds apart); returns the results"""
+    return [engine.update(dets, FRAME, timestamp=i * dt, now=i * dt) for i, dets in enumerate(frames)]
+
+
+def test_activates_after_consecutive_frames_and_alerts_once():
+    engine = HazardEngine()
+    results = run(engine, [chair_at(engine, 1.7), chair_at(engine, 1.7), chair_at(engine, 1.7)])
+
+    assert results[0].hazards == [] and results[0].alerts == []
+    assert [h["type"] for h in results[1].hazards] == ["obstacle_in_path"]
+    assert [a["message"] for a in results[1].alerts] == ["chair ahead, 1.7 meters"]
+    assert results[2].alerts == []  # cooldown
+
+
+def test_interrupted_streak_does_not_activate():
+    engine = HazardEngine()
+    far = 2.17  # outside obstacle_distance_m, same track by IoU
+    frames = [chair_at(engine, 1.7)] + [chair_at(engine, far)] * 4 + [chair_at(engine, 1.7), chair_at(engine, 1.7)]
+    results = run(engine, frames)
+
+    assert all(r.hazards == [] for r in results[:6])
+    assert [h["type"] for h in results[6].hazards] == ["obstacle_in_path"]
+
+
+def test_missed_frame_resets_streak():
+    engine = HazardEngine()
+    results = run(engine, [chair_at(engine, 1.7), [], chair_at(engine, 1.7)])
+
+    assert all(r.hazards == [] for r in results)
+
+
+def test_clears_after_misses_and_holds_within_exit_margin():
+    engine = HazardEngine()
+    frames = [chair_at(engine, 1.7)] * 2 + [chair_at(engine, 2.2)] + [[]] * 3
+    results = run(engine, frames)
+
+    # 2.2 m is past the 2 m threshold but inside the 1.25x exit margin
+    assert results[2].hazards and results[2].hazards[0]["distance_m"] > 2.0
+    assert results[3].hazards and results[4].hazards
+    assert results[5].hazards == []
+
+
+def test_escalation_is_announced_within_cooldown():
+    engine = HazardEngine()
+    # Closing at 3 m/s, one frame every 0.5 s
+    frames = [car_at(engine, d) for d in (10.0, 8.5, 7.0, 5.5, 4.0)]
+    results = run(engine, frames, dt=0.5)
+    spoken = [[(a["severity"], a["message"]) for a in r.alerts] for r in results]
+
+    assert spoken[:2] == [[], []]
+    assert spoken[2] == [("warning", "car approaching, 7 meters")]
+    assert spoken[3] == [("critical", "car approaching, 6 meters")]
+    assert spoken[4] == []  # still critical, cooldown applies
+
+
+def test_separate_objects_have_separate_cooldowns():
+    engine = HazardEngine()
+    # Two parked cars close enough to be critical, left and right of the path
+    frames = [car_at(engine, 3.5, x1=20) + car_at(engine, 3.5, x1=420)] * 3
+    results = run(engine, frames)
+    spoken = [[a["track_id"] for a in r.alerts] for r in results]
+
+    assert spoken[0] == []
+    assert len(spoken[1]) == 1 and len(spoken[2]) == 1
+    assert spoken[1] != spoken[2]
@@ -9,7 +9,7 @@ except Exception:
 
 load_dotenv()
 
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 import cv2
 import base64
@@ -17,9 +17,13 @@ import numpy as np
 import os
 import threading
 import time
+
 from detector import VisionDetector
+from aura_perception import Detection, HazardEngine, ReplayCapture, open_capture
 from tts_handler import TTSHandler
 from stt_handler import STTHandler
+import metrics
+from metrics import stage_timer
 import google.generativeai as genai
 from dotenv import load_dotenv
 
@@ -39,43 +43,163 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
     gemini_model = genai.GenerativeModel("gemini-1.5-flash")
-    print("[INFO] Gemini API configured")
+    metrics.log("INFO", "Gemini API configured")
 else:
     gemini_model = None
-    print("[WARN] Gemini API key not found")
+    metrics.log("WARN", "Gemini API key not found")
+
+@app.before_request
+def start_trace():
+    """Tag the request with a trace id and start timing it"""
+    g.trace_id = metrics.new_trace_id(request.headers.get("X-Request-ID"))
+    g.request_start = time.perf_counter()
+    metrics.profiler.begin()
+
+@app.after_request
+def finish_trace(response):
+    """Record request latency and echo the trace id back to the caller"""
+    elapsed = time.perf_counter() - g.get("request_start", time.perf_counter())
+    endpoint = request.endpoint or "unknown"
+    labels = {"endpoint": endpoint, "method": request.method, "status": str(response.status_code)}
+    metrics.REQUEST_SECONDS.observe(elapsed, **labels)
+    metrics.REQUESTS_TOTAL.inc(**labels)
+    metrics.profiler.end(endpoint, elapsed)
+    response.headers["X-Request-ID"] = g.get("trace_id", "")
+    metrics.clear_trace()
+    return response
+
+# Face enrollment burst (request overrides are clamped to these ranges)
+ENROLL_SAMPLES = 5
+ENROLL_WINDOW_S = 1.5
+ENROLL_SAMPLES_RANGE = (1, 20)
+ENROLL_WINDOW_RANGE_S = (0.1, 10.0)
 
 # Camera state
 camera_active = False
 camera_thread = None
 latest_frame = None
+latest_frame_time = None
 frame_lock = threading.Lock()
 
+# Hazard monitor: runs object detection on every live frame while the camera
+# is on and speaks alerts. It shares the YOLO model with request threads;
+# inference is serialized on the model, so requests may wait behind a monitor
+# frame. With AURA_HAZARD_MONITOR=0, detect/describe speak critical hazards
+# found in the frame they process instead.
+HAZARD_MONITOR = os.getenv("AURA_HAZARD_MONITOR", "1") == "1"
+hazard_thread = None
+latest_hazards = []
+
 def camera_worker():
     """Background thread to capture frames"""
-    global latest_frame, camera_active
-    
-    cap = cv2.VideoCapture(0)
+    global latest_frame, latest_frame_time, camera_active
+    
+    # Webcam by default; AURA_CAMERA=<file.aurarec> replays a recorded session
+    try:
+        cap = open_capture()
+    except Exception as e:
+        # e.g. a bad AURA_REPLAY_SPEED; never leave camera_active stuck on
+        metrics.log("ERROR", f"Cannot open camera: {e}")
+        camera_active = False
+        return
     if not cap.isOpened():
-        print("[ERROR] Cannot open camera")
+        metrics.log("ERROR", "Cannot open camera")
         camera_active = False
         return
     
-    print("[INFO] Camera started")
+    metrics.log("INFO", "Camera started")
+    # A replay paces itself (real time, accelerated or as fast as possible)
+    throttle = not isinstance(cap, ReplayCapture)
     
     while camera_active:
         ret, frame = cap.read()
         if ret:
             with frame_lock:
                 latest_frame = frame.copy()
-        time.sleep(0.033)  # ~30 FPS
+                latest_frame_time = time.time()
+        elif getattr(cap, "exhausted", False):
+            metrics.log("INFO", "Replay finished")
+            camera_active = False
+            break
+        if throttle:
+            time.sleep(0.033)  # ~30 FPS
     
     cap.release()
-    print("[INFO] Camera stopped")
+    metrics.log("INFO", "Camera stopped")
+
+def hazard_worker():
+    """Background thread that turns live detections into spoken hazard alerts"""
+    global latest_hazards
+    
+    engine = HazardEngine()
+    last = None
+    metrics.log("INFO", "Hazard monitor started")
+    
+    while camera_active:
+        # Frames are replaced, never mutated, so no copy is needed
+        with frame_lock:
+            frame, frame_time = latest_frame, latest_frame_time
+        if frame is None or frame is last:
+            time.sleep(0.005)
+            continue
+        last = frame
+        
+        try:
+            with stage_timer("hazard_detect"):
+                detections = detector.object_detector.detect(frame)
+            with stage_timer("hazard_rules"):
+                result = engine.update(detections, frame.shape, timestamp=frame_time)
+        except Exception as e:
+            metrics.log("HAZARD ERROR", e)
+            continue
+        
+        latest_hazards = result.hazards
+        for alert in result.alerts:
+            metrics.log("HAZARD", alert['message'])
+            tts.alert(alert["message"], deadline=alert["deadline"])
+    
+    latest_hazards = []
+    metrics.log("INFO", "Hazard monitor stopped")
+
+def monitor_running():
+    return HAZARD_MONITOR and camera_active
+
+def frame_hazards(objects, frame_shape, speak=False):
+    """Single-frame hazard check for a detection result (no tracking history).
+    
+    With speak=True the most severe hazard is queued as a TTS alert when it
+    is critical.
+    """
+    detections = [Detection(o["label"], o["confidence"], o["bbox"]) for o in objects]
+    result = HazardEngine(activate_frames=1).update(detections, frame_shape)
+    if speak:
+        for alert in result.alerts:
+            if alert["severity"] == "critical":
+                metrics.log("HAZARD", alert["message"])
+                tts.alert(alert["message"], deadline=alert["deadline"])
+    return result.hazards
+
+def collect_frames(samples, window_s):
+    """Copy up to `samples` distinct camera frames spread over window_s seconds"""
+    frames = []
+    last = None
+    interval = window_s / max(1, samples)
+    deadline = time.time() + window_s
+    
+    while len(frames) < samples and time.time() <= deadline:
+        with stage_timer("frame_copy"), frame_lock:
+            current = latest_frame
+            if current is not None and current is not last:
+                frames.append(current.copy())
+                last = current
+        time.sleep(interval)
+    
+    return frames
 
 @app.route('/api/camera/start', methods=['POST'])
 def start_camera():
     """Start camera capture"""
-    global camera_active, camera_thread
+    global camera_active, camera_thread, hazard_thread
     
     if camera_active:
         return jsonify({"status": "already_running"}), 200
@@ -84,6 +208,10 @@ def start_camera():
     camera_thread = threading.Thread(target=camera_worker, daemon=True)
     camera_thread.start()
     
+    if HAZARD_MONITOR:
+        hazard_thread = threading.Thread(target=hazard_worker, daemon=True)
+        hazard_thread.start()
+    
     return jsonify({"status": "started"}), 200
 
 @app.route('/api/camera/stop', methods=['POST'])
@@ -94,6 +222,8 @@ def stop_camera():
     camera_active = False
     if camera_thread:
         camera_thread.join(timeout=2)
+    if hazard_thread:
+        hazard_thread.join(timeout=2)
     
     return jsonify({"status": "stopped"}), 200
 
@@ -108,29 +238,36 @@ def detect():
     global latest_frame
     
     # Get frame from request or use latest camera frame
-    if 'image' in request.files:
+    uploaded = 'image' in request.files
+    if uploaded:
         # Image uploaded
         file = request.files['image']
-        npimg = np.frombuffer(file.read(), np.uint8)
-        frame = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
+        with stage_timer("jpeg_decode"):
+            npimg = np.frombuffer(file.read(), np.uint8)
+            frame = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
     elif latest_frame is not None:
         # Use camera frame
-        with frame_lock:
+        with stage_timer("frame_copy"), frame_lock:
             frame = latest_frame.copy()
     else:
         return jsonify({"error": "No frame available"}), 400
     
     # Detect objects and faces
+    shape = frame.shape
     objects, frame = detector.detect_objects(frame)
     faces, frame = detector.detect_faces(frame)
+    # The monitor already alerts on live camera frames
+    hazards = frame_hazards(objects, shape, speak=uploaded or not monitor_running())
     
     # Encode annotated frame
-    _, buffer = cv2.imencode('.jpg', frame)
-    img_base64 = base64.b64encode(buffer).decode('utf-8')
+    with stage_timer("jpeg_encode"):
+        _, buffer = cv2.imencode('.jpg', frame)
+        img_base64 = base64.b64encode(buffer).decode('utf-8')
     
     return jsonify({
         "objects": objects,
         "faces": faces,
+        "hazards": hazards,
         "annotated_image": f"data:image/jpeg;base64,{img_base64}"
     }), 200
 
@@ -143,7 +280,7 @@ def describe_scene():
     if latest_frame is None:
         return jsonify({"error": "No frame available"}), 400
     
-    with frame_lock:
+    with stage_timer("frame_copy"), frame_lock:
         frame = latest_frame.copy()
     
     # Detect
@@ -155,16 +292,20 @@ def describe_scene():
     face_list = ", ".join([f["name"] for f in faces]) if faces else "no people"
     
     context = f"Objects detected: {object_list}. People detected: {face_list}."
+    hazards = latest_hazards if monitor_running() else frame_hazards(objects, frame.shape, speak=True)
+    if hazards:
+        context += " Hazards: " + "; ".join(h["message"] for h in hazards) + "."
     
     # Generate description
     if gemini_model:
         try:
             prompt = f"You are assisting a visually impaired person. {context} Describe what you see in one clear, helpful sentence."
-            response = gemini_model.generate_content(prompt)
+            with stage_timer("gemini"):
+                response = gemini_model.generate_content(prompt)
             description = response.text.strip()
         except Exception as e:
             description = f"I can see {object_list} and {face_list}."
-            print(f"[GEMINI ERROR] {e}")
+            metrics.log("GEMINI ERROR", e)
     else:
         description = f"I can see {object_list} and {face_list}."
     
@@ -174,12 +315,13 @@ def describe_scene():
     return jsonify({
         "description": description,
         "objects": objects,
-        "faces": faces
+        "faces": faces,
+        "hazards": hazards
     }), 200
 
 @app.route('/api/face/add', methods=['POST'])
 def add_face():
-    """Add a new face to database"""
+    """Add a new face to database (body: {name, samples?, window_s?})"""
     global latest_frame
     
     data = request.json
@@ -191,10 +333,19 @@ def add_face():
     if latest_frame is None:
         return jsonify({"error": "No frame available"}), 400
     
-    with frame_lock:
-        frame = latest_frame.copy()
+    # Several frames over a short window; blurry or bad samples are filtered out
+    try:
+        samples = int(data.get('samples', ENROLL_SAMPLES))
+        window_s = float(data.get('window_s', ENROLL_WINDOW_S))
+    except (TypeError, ValueError):
+        return jsonify({"error": "samples and window_s must be numbers"}), 400
+    if window_s != window_s:  # NaN
+        return jsonify({"error": "samples and window_s must be numbers"}), 400
+    samples = min(max(samples, ENROLL_SAMPLES_RANGE[0]), ENROLL_SAMPLES_RANGE[1])
+    window_s = min(max(window_s, ENROLL_WINDOW_RANGE_S[0]), ENROLL_WINDOW_RANGE_S[1])
+    frames = collect_frames(samples, window_s)
     
-    success, message = detector.add_face(frame, name)
+    success, message = detector.add_face(frames, name)
     
     if success:
         tts.speak(f"Saved {name} successfully")
@@ -261,11 +412,10 @@ def process_voice_command(text):
             name = text.split("add person")[-1].strip()
         
         if name:
-            with frame_lock:
-                frame = latest_frame.copy() if latest_frame is not None else None
+            frames = collect_frames(ENROLL_SAMPLES, ENROLL_WINDOW_S)
             
-            if frame is not None:
-                success, message = detector.add_face(frame, name)
+            if frames:
+                success, message = detector.add_face(frames, name)
                 return message
         return "Please say the person's name"
     
@@ -294,12 +444,31 @@ def process_voice_command(text):
     else:
         return "I didn't understand that command. Try saying 'what do you see' or 'save person as [name]'"
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of stage and request metrics"""
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/profiler', methods=['GET', 'POST'])
+def profiler_control():
+    """Inspect or switch the sampling profiler (body: {enabled, threshold_ms, interval_ms})"""
+    if request.method == 'POST':
+        data = request.json or {}
+        status = metrics.profiler.configure(
+            enabled=data.get('enabled'),
+            interval_ms=data.get('interval_ms'),
+            threshold_ms=data.get('threshold_ms'),
+        )
+        return jsonify(status), 200
+    return jsonify(metrics.profiler.status()), 200
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
         "camera_active": camera_active,
+        "hazard_monitor": monitor_running(),
         "gemini_available": gemini_model is not None
     }), 200
 
@@ -313,10 +482,12 @@ if __name__ == '__main__':
     print("  POST /api/camera/stop     - Stop camera")
     print("  POST /api/detect          - Run detection")
     print("  POST /api/describe        - Describe scene with voice")
-    print("  POST /api/face/add        - Add face (body: {name})")
+    print("  POST /api/face/add        - Add face (body: {name, samples?, window_s?})")
     print("  POST /api/face/delete     - Delete face (body: {name})")
     print("  GET  /api/face/list       - List known faces")
     print("  POST /api/voice/listen    - Listen for voice command")
+    print("  GET  /metrics             - Prometheus metrics")
+    print("  GET/POST /api/profiler    - Sampling profiler status / toggle")
     print("="*60)
     
     app.run(host='0.0.0.0', port=5001, debug=True, threaded=True)
@@ -1,20 +1,31 @@
-import cv2
 import face_recognition
 import pickle
 import os
-from ultralytics import YOLO
 import numpy as np
 
+from aura_perception import (
+    ObjectDetector, DlibFaceEncoder, FaceGallery, FacePrototype, draw_detections, draw_faces,
+    prototypes_from_flat, sharpness,
+)
+from metrics import stage_timer, log
+
+MATCH_TOLERANCE = 0.5
+# Enrollment quality gates, applied to the full-resolution face crop
+MIN_FACE_PX = 60
+MIN_SHARPNESS = float(os.getenv("AURA_ENROLL_MIN_SHARPNESS", "50"))
+
 class VisionDetector:
     def __init__(self):
-        # Load YOLOv8 model (will auto-download on first run)
-        print("[INFO] Loading YOLOv8 model...")
-        self.yolo_model = YOLO('yolov8n.pt')  # Change to yolov8m.pt for better accuracy
+        # YOLOv8 from the shared runtime (downloaded into the model cache on first run)
+        self.object_detector = ObjectDetector(os.getenv("AURA_YOLO_WEIGHTS", "yolov8n.pt"))
+        self.face_encoder = DlibFaceEncoder(scale=0.25)
         
         # Face recognition setup
         self.face_encodings_path = "face_db/encodings.pkl"
-        self.known_encodings = []
-        self.known_names = []
+        # One prototype (mean + exemplars) per identity in a copy-on-write
+        # gallery: request threads match against immutable snapshots while
+        # enrollments publish new versions and are saved in the background
+        self.gallery = FaceGallery(persist=self.save_face_encodings)
         self.load_face_encodings()
         
     def load_face_encodings(self):
@@ -22,120 +33,142 @@ class VisionDetector:
         if os.path.exists(self.face_encodings_path):
             with open(self.face_encodings_path, "rb") as f:
                 data = pickle.load(f)
-                self.known_encodings = data.get("encodings", [])
-                self.known_names = data.get("names", [])
-            print(f"[INFO] Loaded {len(self.known_encodings)} known faces")
+            if "prototypes" in data:
+                prototypes = {
+                    name: FacePrototype.from_dict(proto)
+                    for name, proto in data["prototypes"].items()
+                }
+            else:
+                # Older databases store one flat list of samples
+                prototypes = prototypes_from_flat(
+                    data.get("encodings", []), data.get("names", [])
+                )
+            self.gallery.load(prototypes)
+            log("INFO", f"Loaded {len(prototypes)} known faces")
         else:
-            print("[INFO] No existing face database found")
+            log("INFO", "No existing face database found")
     
-    def save_face_encodings(self):
-        """Save face encodings to pickle file"""
+    def save_face_encodings(self, snapshot=None):
+        """Save a gallery snapshot to the pickle file (atomically replaced)"""
+        if snapshot is None:
+            snapshot = self.gallery.snapshot
         os.makedirs("face_db", exist_ok=True)
-        with open(self.face_encodings_path, "wb") as f:
+        tmp_path = self.face_encodings_path + ".tmp"
+        with open(tmp_path, "wb") as f:
             pickle.dump({
-                "encodings": self.known_encodings,
-                "names": self.known_names
+                "encodings": list(snapshot.matrix),
+                "names": list(snapshot.names),
+                "prototypes": {
+                    name: proto.to_dict() for name, proto in snapshot.prototypes.items()
+                }
             }, f)
-        print("[INFO] Face encodings saved")
+        os.replace(tmp_path, self.face_encodings_path)
+        log("INFO", f"Face encodings saved (version {snapshot.version})")
+    
+    @property
+    def known_encodings(self):
+        return self.gallery.snapshot.matrix
+    
+    @property
+    def known_names(self):
+        return list(self.gallery.snapshot.names)
     
     def detect_objects(self, frame):
         """Detect objects using YOLOv8"""
-        results = self.yolo_model(frame, verbose=False)[0]
-        detected_objects = []
-        
-        for box in results.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-            confidence = float(box.conf[0])
-            class_id = int(box.cls[0])
-            label = self.yolo_model.names[class_id]
-            
-            detected_objects.append({
-                "label": label,
-                "confidence": confidence,
-                "bbox": [x1, y1, x2, y2]
-            })
-            
-            # Draw on frame
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(frame, f"{label} {confidence:.2f}", 
-                       (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 
-                       0.6, (0, 255, 0), 2)
+        with stage_timer("yolo"):
+            detections = self.object_detector.detect(frame)
+        with stage_timer("annotate_objects"):
+            draw_detections(frame, detections)
         
-        return detected_objects, frame
+        return [d.to_dict() for d in detections], frame
     
     def detect_faces(self, frame):
         """Detect and recognize faces"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Locate at 0.25 scale for speed; boxes come back in frame coordinates
+        with stage_timer("color_convert"):
+            rgb = self.face_encoder.prepare(frame)
+        with stage_timer("face_locate"):
+            locations = face_recognition.face_locations(rgb)
+        with stage_timer("face_encode"):
+            faces = self.face_encoder.encode(rgb, locations)
+        
+        with stage_timer("face_match"):
+            # Nearest prototype row within tolerance, all faces at once,
+            # against one consistent snapshot
+            gallery = self.gallery.snapshot
+            if faces and len(gallery) > 0:
+                labels, _ = gallery.match(
+                    np.stack([f.embedding for f in faces]), MATCH_TOLERANCE, unknown="Unknown"
+                )
+                for face, name in zip(faces, labels):
+                    face.name = name
+        
+        with stage_timer("annotate_faces"):
+            draw_faces(frame, faces)
         
-        # Resize for faster processing
-        small_frame = cv2.resize(rgb_frame, (0, 0), fx=0.25, fy=0.25)
+        # Encoding is kept for adding new faces
+        return [f.to_dict(include_embedding=True) for f in faces], frame
+    
+    def enrollment_sample(self, frame):
+        """Encode the single face in frame, or explain why the frame is unusable.
         
-        # Detect faces
-        face_locations = face_recognition.face_locations(small_frame)
-        face_encodings = face_recognition.face_encodings(small_frame, face_locations)
+        The face is located on the 0.25 downscale like detect_faces, and only
+        the full-resolution crop around it is encoded.
+        """
+        with stage_timer("enroll_locate"):
+            _, locations = self.face_encoder.locate(frame)
         
-        detected_faces = []
+        if len(locations) == 0:
+            return None, "no_face"
+        if len(locations) > 1:
+            return None, "multiple_faces"
         
-        for face_encoding, face_location in zip(face_encodings, face_locations):
-            # Scale back to original size
-            top, right, bottom, left = [v * 4 for v in face_location]
-            
-            # Try to match with known faces
-            name = "Unknown"
-            if len(self.known_encodings) > 0:
-                matches = face_recognition.compare_faces(
-                    self.known_encodings, face_encoding, tolerance=0.5
-                )
-                if True in matches:
-                    first_match_index = matches.index(True)
-                    name = self.known_names[first_match_index]
-            
-            detected_faces.append({
-                "name": name,
-                "bbox": [left, top, right, bottom],
-                "encoding": face_encoding  # For adding new faces
-            })
-            
-            # Draw on frame
-            color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
-            cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
-            cv2.putText(frame, name, (left, top - 10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+        crop, location = self.face_encoder.crop(frame, locations[0])
+        top, right, bottom, left = location
+        if min(bottom - top, right - left) < MIN_FACE_PX:
+            return None, "too_small"
+        if sharpness(crop) < MIN_SHARPNESS:
+            return None, "blurry"
         
-        return detected_faces, frame
+        with stage_timer("enroll_encode"):
+            encoding = self.face_encoder.encode_crop(crop, location)
+        if encoding is None:
+            return None, "no_face"
+        return encoding, "ok"
     
-    def add_face(self, frame, name):
-        """Add a new face to the database"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+    def add_face(self, frames, name):
+        """Add a face to the database from one frame or a short burst of frames"""
+        if isinstance(frames, np.ndarray):
+            frames = [frames]
         
-        if len(face_encodings) == 0:
-            return False, "No face detected in frame"
+        samples = []
+        rejected = {}
+        for frame in frames:
+            encoding, reason = self.enrollment_sample(frame)
+            if encoding is None:
+                rejected[reason] = rejected.get(reason, 0) + 1
+            else:
+                samples.append(encoding)
         
-        if len(face_encodings) > 1:
-            return False, "Multiple faces detected. Please ensure only one face is visible"
+        if not samples:
+            if rejected.get("multiple_faces"):
+                return False, "Multiple faces detected. Please ensure only one face is visible"
+            if rejected.get("blurry") or rejected.get("too_small"):
+                return False, "Face too blurry or too far away. Please hold still and move closer"
+            return False, "No face detected in frame"
         
-        # Add the face
-        self.known_encodings.append(face_encodings[0])
-        self.known_names.append(name)
-        self.save_face_encodings()
+        # Merges into the existing prototype when enrolling a known name again
+        self.gallery.enroll(name, samples)
         
-        return True, f"Successfully added {name}"
+        return True, f"Successfully added {name} ({len(samples)} of {len(frames)} samples used)"
     
     def delete_face(self, name):
         """Delete a face from the database"""
-        if name not in self.known_names:
+        if not self.gallery.remove(name):
             return False, f"No face found with name: {name}"
         
-        # Remove all instances of this name
-        indices_to_keep = [i for i, n in enumerate(self.known_names) if n != name]
-        self.known_encodings = [self.known_encodings[i] for i in indices_to_keep]
-        self.known_names = [self.known_names[i] for i in indices_to_keep]
-        self.save_face_encodings()
-        
         return True, f"Successfully deleted {name}"
     
     def list_known_faces(self):
-        """Return list of all known faces"""
-        return list(set(self.known_names))
+        """Return all known faces (a tuple cached per gallery version)"""
+        return self.gallery.snapshot.identities
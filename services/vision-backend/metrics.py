@@ -0,0 +1,249 @@
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter as _Tally
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond image ops to slow Gemini calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    labels = _format_labels(self.labelnames, key, {"le": bound})
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, {"le": "+Inf"})
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "aura_stage_seconds", "Time spent in each hot-path stage", ("stage",)))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "aura_stage_errors_total", "Exceptions raised inside a timed stage", ("stage",)))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "aura_http_request_seconds", "HTTP request latency", ("endpoint", "method", "status")))
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "aura_http_requests_total", "HTTP requests served", ("endpoint", "method", "status")))
+TTS_ALERTS_DROPPED = REGISTRY.register(Counter(
+    "aura_tts_alerts_dropped_total", "Hazard alerts discarded because their deadline passed before speaking"))
+SLOW_PROFILES = REGISTRY.register(Counter(
+    "aura_slow_request_profiles_total", "Slow requests dumped by the sampling profiler", ("endpoint",)))
+
+
+# ---------------- TRACING ----------------
+_trace = threading.local()
+# Trace ids end up in log lines and profile filenames, so only accept plain tokens
+_TRACE_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def new_trace_id(incoming=None):
+    """Use the caller's X-Request-ID when it is a plain token, otherwise mint one"""
+    if incoming and _TRACE_ID_RE.fullmatch(incoming):
+        trace_id = incoming
+    else:
+        trace_id = uuid.uuid4().hex[:16]
+    _trace.id = trace_id
+    return trace_id
+
+
+def current_trace_id():
+    return getattr(_trace, "id", None)
+
+
+def set_trace(trace_id):
+    """Adopt a trace id captured on another thread (None clears it)"""
+    _trace.id = trace_id
+
+
+def clear_trace():
+    _trace.id = None
+
+
+def log(level, message):
+    """Print a [LEVEL] line tagged with the current trace id, if any"""
+    trace_id = current_trace_id()
+    prefix = f"[{level}] [trace={trace_id}]" if trace_id else f"[{level}]"
+    print(f"{prefix} {message}")
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time a block into aura_stage_seconds{stage=...}"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def observe_stage(stage, seconds):
+    """Record a duration measured elsewhere, e.g. a queue wait"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+# ---------------- SAMPLING PROFILER ----------------
+class SamplingProfiler:
+    """Samples the stacks of in-flight request threads.
+
+    Off by default; when enabled, a background thread snapshots the stack of
+    every tracked thread each interval. Requests slower than threshold_ms
+    get their samples written as collapsed stacks ("frame;frame;frame N"),
+    which flamegraph.pl / speedscope read directly.
+    """
+
+    def __init__(self, out_dir="profiles", interval_ms=5, threshold_ms=500):
+        self.out_dir = out_dir
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.enabled = False
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def configure(self, enabled=None, interval_ms=None, threshold_ms=None):
+        if interval_ms is not None:
+            self.interval_ms = max(1, int(interval_ms))
+        if threshold_ms is not None:
+            self.threshold_ms = float(threshold_ms)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+            if self.enabled and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._thread.start()
+        return self.status()
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "interval_ms": self.interval_ms,
+            "threshold_ms": self.threshold_ms,
+            "out_dir": self.out_dir,
+        }
+
+    def begin(self):
+        if self.enabled:
+            with self._lock:
+                self._active[threading.get_ident()] = _Tally()
+
+    def end(self, endpoint, elapsed_s):
+        """Stop tracking this thread; dump its samples if the request was slow"""
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if not samples or elapsed_s * 1000 < self.threshold_ms:
+            return None
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        trace_id = current_trace_id() or uuid.uuid4().hex[:16]
+        path = os.path.join(self.out_dir, f"{int(time.time())}_{endpoint}_{trace_id}.folded")
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        SLOW_PROFILES.inc(endpoint=endpoint)
+        log("INFO", f"Slow request ({elapsed_s * 1000:.0f} ms) profile written to {path}")
+        return path
+
+    def _sample_loop(self):
+        while self.enabled:
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, tally in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = traceback.extract_stack(frame)
+                    tally[";".join(f"{fs.name} ({os.path.basename(fs.filename)}:{fs.lineno})" for fs in stack)] += 1
+            time.sleep(self.interval_ms / 1000.0)
+
+
+profiler = SamplingProfiler(
+    out_dir=os.getenv("AURA_PROFILE_DIR", "profiles"),
+    threshold_ms=float(os.getenv("AURA_PROFILE_THRESHOLD_MS", "500")),
+)
+if os.getenv("AURA_PROFILE", "0") == "1":
+    profiler.configure(enabled=True)
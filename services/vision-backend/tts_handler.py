@@ -1,6 +1,13 @@
 import pyttsx3
 import threading
 import queue
+import time
+import itertools
+from metrics import stage_timer, observe_stage, log, current_trace_id, set_trace, TTS_ALERTS_DROPPED
+
+# Lower numbers are spoken first
+PRIORITY_ALERT = 0
+PRIORITY_NORMAL = 1
 
 class TTSHandler:
     def __init__(self):
@@ -14,33 +21,48 @@ class TTSHandler:
                 self.engine.setProperty('voice', voice.id)
                 break
         
-        # Queue for thread-safe TTS
-        self.speech_queue = queue.Queue()
+        # Priority queue for thread-safe TTS: hazard alerts jump ahead of
+        # descriptions; FIFO within a priority
+        self.speech_queue = queue.PriorityQueue()
+        self._order = itertools.count()
         self.running = True
         
         # Start worker thread
         self.worker = threading.Thread(target=self._worker, daemon=True)
         self.worker.start()
-        print("[INFO] TTS Handler initialized")
+        log("INFO", "TTS Handler initialized")
     
     def _worker(self):
         """Worker thread to process TTS queue"""
         while self.running:
             try:
-                text = self.speech_queue.get(timeout=0.5)
+                priority, _, text, enqueued_at, deadline, trace_id = self.speech_queue.get(timeout=0.5)
+                # Log under the trace of the request that queued the speech
+                set_trace(trace_id)
+                observe_stage("tts_queue_wait", time.perf_counter() - enqueued_at)
+                if deadline is not None and time.time() > deadline:
+                    # A late hazard alert would describe a scene that has changed
+                    log("TTS", f"Dropped stale alert: {text}")
+                    TTS_ALERTS_DROPPED.inc()
+                    text = None
                 if text:
-                    print(f"[TTS] Speaking: {text}")
-                    self.engine.say(text)
-                    self.engine.runAndWait()
+                    log("TTS", f"Speaking: {text}")
+                    with stage_timer("tts_speak"):
+                        self.engine.say(text)
+                        self.engine.runAndWait()
                 self.speech_queue.task_done()
             except queue.Empty:
                 continue
             except Exception as e:
-                print(f"[TTS ERROR] {e}")
+                log("TTS ERROR", e)
     
     def speak(self, text):
         """Add text to speech queue"""
-        self.speech_queue.put(text)
+        self.speech_queue.put((PRIORITY_NORMAL, next(self._order), text, time.perf_counter(), None, current_trace_id()))
+    
+    def alert(self, text, deadline=None):
+        """Queue an urgent message ahead of normal speech; dropped if not started by deadline (epoch seconds)"""
+        self.speech_queue.put((PRIORITY_ALERT, next(self._order), text, time.perf_counter(), deadline, current_trace_id()))
     
     def stop(self):
         """Stop the TTS handler"""